@@ -11,88 +11,247 @@ Workflow:
 """
 
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from modules.query_generator import generate_search_query
-from modules.web_search import perform_web_search, select_relevant_articles
-from modules.summarizer import process_multiple_articles
-from modules.report_generator import generate_final_report, save_report_to_file
+from modules.query_generator import generate_search_query, get_cached_query, query_similarity
+from modules.web_search import perform_web_search, select_relevant_articles, merge_search_results
+from modules.summarizer import process_multiple_articles, expected_summary_rounds
+from modules.report_generator import build_report, save_report_to_file
+from modules.records import PipelineResult
+from modules.article_budget import ArticleBudget
+from utils.config import get_settings
+from utils.overload import MODE_FULL, MODE_NO_EXECUTIVE, MODE_EXTRACTIVE
+from utils.tracing import start_trace, span, current_trace_id, submit_with_context
 
+# Refined queries at least this similar to the raw topic reuse the raw-topic results
+SPECULATIVE_REUSE_THRESHOLD = 0.5
 
-def run_news_summarizer_agent(topic: str, save_to_file: bool = True) -> str:
+
+def speculative_search(topic: str):
     """
-    Main function to run the complete news summarizer agent pipeline.
+    Run query generation and a raw-topic search in parallel.
+    
+    The Tavily search on the raw topic starts while the LLM refines the query.
+    If the refined query is close enough to the topic, the raw results are reused;
+    otherwise the refined query is searched too and both result sets are merged.
+    
+    Args:
+        topic (str): The news topic
+        
+    Returns:
+        Tuple[str, list]: (search_query, search_results)
+    """
+    cached_query = get_cached_query(topic)
+    if cached_query:
+        print(f"⚡ Using cached query for topic: '{cached_query}'")
+        return cached_query, perform_web_search(cached_query)
+    
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        query_future = submit_with_context(executor, generate_search_query, topic)
+        raw_future = submit_with_context(executor, perform_web_search, topic)
+        
+        search_query = query_future.result()
+        raw_results = raw_future.result()
+    
+    similarity = query_similarity(topic, search_query)
+    if similarity >= SPECULATIVE_REUSE_THRESHOLD:
+        print(f"⚡ Refined query close to topic (similarity {similarity:.2f}), reusing raw-topic results")
+        return search_query, raw_results
+    
+    print(f"🔀 Refined query differs from topic (similarity {similarity:.2f}), merging result sets")
+    refined_results = perform_web_search(search_query)
+    return search_query, merge_search_results(refined_results, raw_results)
+
+
+def _empty_result(topic: str, message: str, search_query: Optional[str] = None,
+                  mode: str = MODE_FULL) -> PipelineResult:
+    """
+    Build a pipeline result for runs that stopped before a report was produced.
+    """
+    return PipelineResult(topic=topic, report=message, query=search_query, mode=mode)
+
+
+def run_news_summarizer_pipeline(topic: str, save_to_file: bool = True, speculative: bool = False,
+                                 mode: str = MODE_FULL, slo: Optional[float] = None) -> PipelineResult:
+    """
+    Run the complete pipeline inside a trace and return the structured result.
     
     Args:
         topic (str): The news topic to summarize
         save_to_file (bool): Whether to save the report to a file
+        speculative (bool): Search the raw topic while the query is being generated
+        mode (str): "full", or a degraded mode: "no_executive" skips the executive
+            summary, "extractive" (fast mode) also summarizes articles locally without the LLM
+        slo (Optional[float]): Target end-to-end latency in seconds; when given, the
+            number of articles fetched adapts to the remaining time (see ArticleBudget)
         
     Returns:
-        str: The final formatted report
+        PipelineResult with 'success', 'topic', 'query', 'report' (plain text),
+        'executive_summary', 'articles', 'failed', 'generated_at', 'mode', 'trace_id'
+        and, with an SLO, 'budget' (the controller's decisions)
+    """
+    started = time.monotonic()
+    with start_trace("pipeline", topic=topic, mode=mode, speculative=speculative, slo=slo) as root:
+        budget = None
+        if slo is not None:
+            budget = ArticleBudget(
+                slo,
+                target=get_settings().max_articles,
+                started=started,
+                extractive=(mode == MODE_EXTRACTIVE),
+                executive_summary=(mode not in (MODE_NO_EXECUTIVE, MODE_EXTRACTIVE)),
+                summary_rounds=expected_summary_rounds()
+            )
+        result = _run_pipeline(topic, save_to_file, speculative, mode, budget)
+        root.set(success=result.success, articles=len(result.articles), failed=len(result.failed))
+        result.trace_id = current_trace_id()
+        return result
+
+
+def _run_pipeline(topic: str, save_to_file: bool, speculative: bool, mode: str,
+                  budget: Optional[ArticleBudget] = None) -> PipelineResult:
+    """
+    Pipeline body for `run_news_summarizer_pipeline` (runs inside its trace).
     """
     
     print("\n" + "=" * 80)
     print(f"🚀 SMART NEWS SUMMARIZER AGENT")
     print(f"Topic: {topic}")
+    print(f"Trace: {current_trace_id()}")
+    if mode != MODE_FULL:
+        print(f"Mode: {mode} (degraded)")
     print("=" * 80 + "\n")
     
+    search_query = None
     try:
-        # ============ MODULE 1: Query Generation ============
-        print("📝 [Module 1] Generating optimized search query...")
-        search_query = generate_search_query(topic)
-        print(f"✅ Generated query: '{search_query}'\n")
-        
-        # ============ MODULE 2: Web Search & Article Selection ============
-        print("🔍 [Module 2] Searching for relevant articles...")
-        search_results = perform_web_search(search_query)
+        if speculative:
+            # ============ MODULES 1 & 2: Speculative Query + Search ============
+            print("⚡ [Module 1+2] Generating query and searching raw topic in parallel...")
+            with span("module1_2.speculative_search"):
+                search_query, search_results = speculative_search(topic)
+            print(f"✅ Generated query: '{search_query}'\n")
+        else:
+            # ============ MODULE 1: Query Generation ============
+            print("📝 [Module 1] Generating optimized search query...")
+            with span("module1.query_generation", topic=topic) as s:
+                search_query = generate_search_query(topic)
+                s.set(query=search_query)
+            print(f"✅ Generated query: '{search_query}'\n")
+            
+            # ============ MODULE 2: Web Search & Article Selection ============
+            print("🔍 [Module 2] Searching for relevant articles...")
+            with span("module2.search", query=search_query) as s:
+                search_results = perform_web_search(search_query)
+                s.set(results=len(search_results))
         
         if not search_results:
             print("❌ No search results found. Agent cannot proceed.")
-            return "❌ No news articles found for this topic."
+            return _empty_result(topic, "❌ No news articles found for this topic.", search_query, mode)
         
         print(f"✅ Found {len(search_results)} results")
         
         print("\n🤖 [Module 2] Autonomously filtering relevant articles...")
-        selected_urls = select_relevant_articles(search_results)
+        backup_urls = []
+        with span("module2.selection", candidates=len(search_results)) as s:
+            if budget is not None:
+                selected_urls, backup_urls = select_relevant_articles(search_results, topic=topic, with_backups=True,
+                                                                      use_llm=mode != MODE_EXTRACTIVE)
+            else:
+                selected_urls = select_relevant_articles(search_results, topic=topic, use_llm=mode != MODE_EXTRACTIVE)
+            s.set(selected=len(selected_urls), backups=len(backup_urls))
+        # The search payloads aren't needed while the (slow) article stage runs
+        del search_results
         
         if not selected_urls:
             print("⚠️  No relevant articles selected after filtering.")
-            return "⚠️  Could not find relevant articles to summarize."
+            return _empty_result(topic, "⚠️  Could not find relevant articles to summarize.", search_query, mode)
         
         print(f"✅ Selected {len(selected_urls)} most relevant articles\n")
         
         # ============ MODULE 3: Article Extraction & Summarization ============
         print("📥 [Module 3] Extracting and summarizing articles...")
-        results = process_multiple_articles(selected_urls)
+        with span("module3.articles", urls=len(selected_urls)) as s:
+            results = process_multiple_articles(
+                selected_urls,
+                backend="extractive" if mode == MODE_EXTRACTIVE else "auto",
+                budget=budget,
+                backups=backup_urls
+            )
+            s.set(skipped=len(results["skipped"]))
         
         processed_articles = results["processed"]
         failed_urls = results["failed"]
+        budget_summary = None
+        if budget is not None:
+            skipped = sum(1 for url in results["skipped"] if url in selected_urls)
+            budget_summary = budget.summary(len(selected_urls), len(backup_urls), skipped)
+            print(f"⏱️  Budget: {budget_summary['processed']} articles, stop reason "
+                  f"{budget_summary['stop_reason']}, {budget.remaining():.1f}s of {budget.slo:.0f}s left")
         
         if not processed_articles:
             print("❌ Could not process any articles.")
-            return "❌ Failed to extract and summarize articles."
+            result = _empty_result(topic, "❌ Failed to extract and summarize articles.", search_query, mode)
+            result.failed = failed_urls
+            result.budget = budget_summary
+            return result
         
         print(f"✅ Successfully processed {len(processed_articles)} articles\n")
         
         # ============ MODULE 4: Report Generation & Error Handling ============
         print("📋 [Module 4] Generating final formatted report...")
-        final_report = generate_final_report(topic, processed_articles, failed_urls)
+        include_executive_summary = mode not in (MODE_NO_EXECUTIVE, MODE_EXTRACTIVE)
+        if include_executive_summary and budget is not None and not budget.allow_executive_summary():
+            print("⏱️  Skipping executive summary to stay within the latency SLO")
+            include_executive_summary = False
+        with span("module4.report", executive_summary=include_executive_summary):
+            result = build_report(
+                topic,
+                processed_articles,
+                failed_urls,
+                include_executive_summary=include_executive_summary
+            )
+        result.success = True
+        result.query = search_query
+        result.mode = mode
+        if budget is not None:
+            # Final decisions, now including the executive summary one
+            result.budget = budget.summary(len(selected_urls), len(backup_urls), budget_summary["skipped"])
         
         # Save report to file if requested
         if save_to_file:
-            save_report_to_file(final_report)
+            save_report_to_file(result.report)
         
         print("✅ Report generation complete!\n")
         
-        return final_report
+        return result
     
     except Exception as e:
         error_msg = f"❌ AGENT ERROR: {str(e)}"
         print(error_msg)
-        return error_msg
+        return _empty_result(topic, error_msg, search_query, mode)
+
+
+def run_news_summarizer_agent(topic: str, save_to_file: bool = True, speculative: bool = False,
+                              slo: Optional[float] = None) -> str:
+    """
+    Main function to run the complete news summarizer agent pipeline.
+    
+    Args:
+        topic (str): The news topic to summarize
+        save_to_file (bool): Whether to save the report to a file
+        speculative (bool): Search the raw topic while the query is being generated
+        slo (Optional[float]): Target latency in seconds; adapts how many articles are fetched
+        
+    Returns:
+        str: The final formatted report
+    """
+    return run_news_summarizer_pipeline(topic, save_to_file, speculative, slo=slo).report
 
 
 def main():
@@ -0,0 +1,118 @@
+"""
+Import-time benchmark.
+
+Runs `python -X importtime` on the server's import path in a fresh interpreter and
+reports the total plus the slowest modules. Use it to catch cold-start regressions:
+
+    python benchmarks/import_time.py                      # report
+    python benchmarks/import_time.py --json               # machine-readable report
+    python benchmarks/import_time.py --max-ms 1500        # fail if total exceeds 1.5s
+    python benchmarks/import_time.py --write-baseline b.json
+    python benchmarks/import_time.py --baseline b.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Fails (instead of timing the demo fallback) if the real pipeline cannot be imported
+DEFAULT_TARGET = "import main, sys; sys.exit(0 if main._load_pipeline() else 'pipeline failed to import')"
+
+
+def measure(target: str) -> dict:
+    """
+    Import `target` in a fresh interpreter and parse the -X importtime output.
+
+    Returns:
+        dict with 'total_ms' and 'modules' (name -> {'self_ms', 'cumulative_ms'})
+    """
+    env = dict(os.environ)
+    # The pipeline modules create API clients at import; dummy keys keep that offline
+    env.setdefault("GROQ_API_KEY", "benchmark")
+    env.setdefault("TAVILY_API_KEY", "benchmark")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", target],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        output = "\n".join(line for line in (proc.stdout + proc.stderr).splitlines()
+                           if not line.startswith("import time:"))
+        raise RuntimeError(f"Import failed:\n{output[-2000:]}")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules[name.strip()] = {
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+            }
+        except ValueError:
+            continue
+
+    total_ms = sum(m["self_ms"] for m in modules.values())
+    return {"total_ms": round(total_ms, 1), "modules": modules}
+
+
+def run(target: str, repeat: int) -> dict:
+    """
+    Measure `repeat` times and keep the median run (import times are noisy).
+    """
+    runs = [measure(target) for _ in range(repeat)]
+    median_total = statistics.median(r["total_ms"] for r in runs)
+    return min(runs, key=lambda r: abs(r["total_ms"] - median_total))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of the API server")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help="Python statement to time")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs to take the median of")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--max-ms", type=float, help="Fail if total import time exceeds this")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--write-baseline", help="Write the measured total to this file")
+    args = parser.parse_args()
+
+    try:
+        result = run(args.target, args.repeat)
+    except RuntimeError as e:
+        print(f"FAIL: {e}", file=sys.stderr)
+        sys.exit(1)
+    slowest = sorted(result["modules"].items(), key=lambda kv: kv[1]["self_ms"], reverse=True)[:args.top]
+
+    if args.json:
+        print(json.dumps({"total_ms": result["total_ms"], "slowest": dict(slowest)}, indent=2))
+    else:
+        print(f"Total import time: {result['total_ms']:.1f} ms ({len(result['modules'])} modules)")
+        print(f"{'self ms':>10} {'cumul ms':>10}  module")
+        for name, m in slowest:
+            print(f"{m['self_ms']:>10.1f} {m['cumulative_ms']:>10.1f}  {name}")
+
+    if args.write_baseline:
+        Path(args.write_baseline).write_text(json.dumps({"total_ms": result["total_ms"]}) + "\n")
+
+    failed = False
+    if args.max_ms is not None and result["total_ms"] > args.max_ms:
+        print(f"FAIL: {result['total_ms']:.1f} ms exceeds --max-ms {args.max_ms:.1f}", file=sys.stderr)
+        failed = True
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())["total_ms"]
+        limit = baseline * (1 + args.tolerance)
+        if result["total_ms"] > limit:
+            print(f"FAIL: {result['total_ms']:.1f} ms exceeds baseline {baseline:.1f} ms "
+                  f"+{args.tolerance:.0%}", file=sys.stderr)
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,526 @@
+"""
+Load test for the Flask API.
+
+Starts local stand-in servers for Groq, Tavily and a handful of news sites, runs the
+real app (`main:app` under waitress) against them and ramps up concurrent
+`POST /api/summarize` requests. For every server configuration (threads x workers x
+cache on/off) and concurrency level it reports throughput, latency percentiles,
+error/shed rates, upstream calls per request and server RSS/CPU.
+
+    python benchmarks/load_test.py                                  # default ramp
+    python benchmarks/load_test.py --threads 4,8 --workers 1,2 --cache on,off
+    python benchmarks/load_test.py --concurrency 1,4,16,32 --duration 20
+    python benchmarks/load_test.py --llm-latency 1500 --llm-errors 0.05 --json
+
+Upstream latencies are lognormal (median in ms, shared --latency-sigma); errors are
+injected at the given rates (Groq: 429/500, Tavily: 500, news sites: 403/404).
+Each worker is a separate waitress process on its own port; the client spreads
+requests over them round-robin, as a load balancer in front of N containers would.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_SENTENCES = [
+    "Officials said the {topic} announcement came after months of negotiations.",
+    "Analysts expect the {topic} developments to shape the market for the rest of the year.",
+    "Several companies involved in {topic} reported stronger results than forecast.",
+    "Critics argued that the {topic} plan leaves important questions unanswered.",
+    "The {topic} story drew attention from regulators in Europe and Asia.",
+    "Investors reacted cautiously as new details about {topic} emerged on Tuesday.",
+    "Experts noted that {topic} has been a recurring theme in recent policy debates.",
+    "A spokesperson declined to comment further on the {topic} situation.",
+]
+
+
+class UpstreamProfile:
+    """Latency and error behaviour of one stand-in upstream."""
+
+    def __init__(self, median_ms: float, sigma: float, error_rate: float, error_codes):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.error_codes = error_codes
+
+    def delay(self):
+        if self.median_ms > 0:
+            time.sleep(random.lognormvariate(math.log(self.median_ms / 1000), self.sigma))
+
+    def error(self):
+        if self.error_rate and random.random() < self.error_rate:
+            return random.choice(self.error_codes)
+        return None
+
+
+class MockUpstreams:
+    """
+    Stand-in Groq, Tavily and news servers on localhost.
+
+    Groq and Tavily share one server; each news site runs on its own port so the
+    app's per-domain health tracking sees distinct domains.
+    """
+
+    def __init__(self, llm: UpstreamProfile, search: UpstreamProfile, news: UpstreamProfile,
+                 news_sites: int = 8, article_paragraphs: int = 30):
+        self.llm = llm
+        self.search = search
+        self.news = news
+        self.article_paragraphs = article_paragraphs
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._servers = []
+        self.api_url = self._serve(self._api_handler())
+        self.news_urls = [self._serve(self._news_handler()) for _ in range(news_sites)]
+
+    def _serve(self, handler) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    def count(self, name: str):
+        with self._lock:
+            self.calls[name] += 1
+
+    def snapshot(self) -> Counter:
+        with self._lock:
+            return Counter(self.calls)
+
+    def close(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+
+    def _api_handler(self):
+        upstreams = self
+
+        class Handler(_QuietHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if self.path.endswith("/chat/completions"):
+                    upstreams.count("groq")
+                    self.respond(upstreams.llm, lambda: upstreams.chat_completion(body))
+                elif self.path.rstrip("/").endswith("/search"):
+                    upstreams.count("tavily")
+                    self.respond(upstreams.search, lambda: upstreams.search_results(body))
+                else:
+                    self.send_json(404, {"error": "not found"})
+
+        return Handler
+
+    def _news_handler(self):
+        upstreams = self
+
+        class Handler(_QuietHandler):
+            def do_GET(self):
+                upstreams.count("news")
+                upstreams.news.delay()
+                code = upstreams.news.error()
+                if code:
+                    self.send_json(code, {"error": "injected"})
+                    return
+                payload = upstreams.article_html(self.path).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+    def chat_completion(self, body) -> dict:
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        if "URL:" in prompt:
+            content = "\n".join(re.findall(r"URL: (\S+)", prompt)[:5])
+        elif "search query" in prompt:
+            topic = re.search(r'topic: "([^"]*)"', prompt)
+            content = f"{topic.group(1) if topic else 'news'} latest news"
+        elif "executive summary" in prompt:
+            content = ("Across the coverage, the main developments point to steady progress, with "
+                       "analysts watching regulators, markets and company results closely.")
+        else:
+            content = ("The article reports new developments and reactions from officials and analysts. "
+                       "It highlights the market impact and the open questions that remain.")
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-{random.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def search_results(self, body) -> dict:
+        query = body.get("query", "news")
+        slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-") or "news"
+        results = []
+        for i in range(int(body.get("max_results") or 10)):
+            site = self.news_urls[i % len(self.news_urls)]
+            results.append({
+                "title": f"{query.title()} - report {i + 1}",
+                "url": f"{site}/news/{slug}/{i}",
+                "content": f"Latest coverage of {query}: what happened and why it matters.",
+                "score": round(1 - i * 0.05, 2),
+            })
+        return {"query": query, "results": results, "response_time": 0.1}
+
+    def article_html(self, path: str) -> str:
+        topic = path.strip("/").split("/")[1].replace("-", " ") if path.count("/") >= 2 else "news"
+        rng = random.Random(path)
+        paragraphs = "".join(
+            "<p>" + " ".join(rng.choice(_SENTENCES).format(topic=topic) for _ in range(4)) + "</p>"
+            for _ in range(self.article_paragraphs)
+        )
+        return (f"<html><head><title>{topic.title()} update</title></head><body>"
+                f"<article><h1>{topic.title()} update</h1>{paragraphs}</article></body></html>")
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def respond(self, profile: UpstreamProfile, make_body):
+        profile.delay()
+        code = profile.error()
+        if code:
+            self.send_json(code, {"error": {"message": "injected error", "type": "load_test"}})
+        else:
+            self.send_json(200, make_body())
+
+    def send_json(self, code: int, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if code == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ---- App under test ----
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """`workers` waitress processes serving main:app, pointed at the mock upstreams."""
+
+    def __init__(self, upstreams: MockUpstreams, threads: int, workers: int, cache: bool, extra_env=None):
+        self.state_dir = tempfile.mkdtemp(prefix="news-loadtest-")
+        self.urls = []
+        self.procs = []
+        for i in range(workers):
+            port = _free_port()
+            env = dict(os.environ)
+            env.update({
+                "GROQ_API_KEY": "load-test",
+                "TAVILY_API_KEY": "load-test",
+                "GROQ_BASE_URL": upstreams.api_url,
+                "TAVILY_API_URL": upstreams.api_url,
+                "SEARCH_BACKEND": "tavily",
+                "NEWS_AGENT_PRELOAD": "1",
+                "REPORT_DB_PATH": os.path.join(self.state_dir, f"reports-{i}.db"),
+                "DOMAIN_HEALTH_PATH": os.path.join(self.state_dir, f"domain_health-{i}.json"),
+                "PYTHONUNBUFFERED": "1",
+            })
+            if not cache:
+                env.update({"SEARCH_CACHE_TTL": "0", "QUERY_CACHE_TTL": "0", "CHUNK_CACHE_TTL": "0",
+                            "CACHED_REPORT_MAX_AGE": "0"})
+            env.update(extra_env or {})
+            log = open(os.path.join(self.state_dir, f"server-{i}.log"), "w")
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "waitress", f"--listen=127.0.0.1:{port}",
+                 f"--threads={threads}", "main:app"],
+                cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+            )
+            self.procs.append(proc)
+            self.urls.append(f"http://127.0.0.1:{port}")
+        self._wait_ready()
+
+    def _wait_ready(self, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        for url, proc in zip(self.urls, self.procs):
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"Server exited early, see logs in {self.state_dir}")
+                try:
+                    if requests.get(url + "/api/health", timeout=1).ok:
+                        break
+                except requests.RequestException:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Server at {url} did not become ready")
+                time.sleep(0.2)
+
+    def stop(self):
+        for proc in self.procs:
+            proc.terminate()
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+
+class ResourceSampler:
+    """Samples RSS and CPU time of the server processes from /proc (Linux only)."""
+
+    _TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def __init__(self, pids, interval: float = 0.5):
+        self.pids = pids
+        self.interval = interval
+        self.peak_rss_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _rss_mb(self):
+        total = 0
+        for pid in self.pids:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+        return total / 1024
+
+    def _cpu_seconds(self):
+        total = 0
+        for pid in self.pids:
+            with open(f"/proc/{pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])  # utime + stime
+        return total / self._TICKS
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                rss = self._rss_mb()
+                self.peak_rss_mb = max(self.peak_rss_mb or 0, rss)
+            except (OSError, ValueError):
+                return
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        try:
+            self._cpu_start = self._cpu_seconds()
+        except (OSError, ValueError):
+            self._cpu_start = None
+        self._wall_start = time.monotonic()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.cpu_percent = None
+        if self._cpu_start is not None:
+            try:
+                elapsed = time.monotonic() - self._wall_start
+                self.cpu_percent = 100 * (self._cpu_seconds() - self._cpu_start) / elapsed
+            except (OSError, ValueError):
+                pass
+
+
+# ---- Load generation ----
+
+def _percentile(values, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_level(app: AppServer, upstreams: MockUpstreams, concurrency: int, duration: float,
+              topics, body_extra, timeout: float) -> dict:
+    """
+    Keep `concurrency` clients busy for `duration` seconds and summarize the results.
+    """
+    samples = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+    targets = itertools.cycle(app.urls)
+    topic_cycle = itertools.cycle(topics)
+
+    def client():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            with lock:
+                url = next(targets)
+                topic = next(topic_cycle)
+            start = time.monotonic()
+            try:
+                response = session.post(url + "/api/summarize", json=dict(body_extra, topic=topic), timeout=timeout)
+                status = response.status_code
+                payload = response.json() if status == 200 else {}
+                ok = status == 200 and payload.get("success", False)
+                mode = payload.get("degraded_mode") or "full"
+            except requests.RequestException as e:
+                status, ok, mode = type(e).__name__, False, None
+            with lock:
+                samples.append((time.monotonic() - start, status, ok, mode))
+
+    calls_before = upstreams.snapshot()
+    with ResourceSampler([p.pid for p in app.procs]) as resources:
+        started = time.monotonic()
+        workers = [threading.Thread(target=client) for _ in range(concurrency)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        elapsed = time.monotonic() - started
+    calls = upstreams.snapshot() - calls_before
+
+    latencies = [s[0] for s in samples if s[2]]
+    statuses = Counter(str(s[1]) for s in samples)
+    ok = sum(1 for s in samples if s[2])
+    total = len(samples)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": ok,
+        "throughput_rps": round(ok / elapsed, 2),
+        "latency_p50_s": _round(_percentile(latencies, 50)),
+        "latency_p95_s": _round(_percentile(latencies, 95)),
+        "latency_p99_s": _round(_percentile(latencies, 99)),
+        "latency_mean_s": _round(statistics.mean(latencies) if latencies else None),
+        "error_rate": round((total - ok) / total, 3) if total else None,
+        "shed_503": statuses.get("503", 0),
+        "statuses": dict(statuses),
+        "modes": dict(Counter(s[3] for s in samples if s[2])),
+        "upstream_calls_per_request": {k: round(v / total, 2) for k, v in calls.items()} if total else {},
+        "peak_rss_mb": _round(resources.peak_rss_mb, 1),
+        "cpu_percent": _round(resources.cpu_percent, 1),
+    }
+
+
+def _round(value, digits: int = 3):
+    return None if value is None else round(value, digits)
+
+
+def _print_level(row: dict):
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-".rjust(len(format(0, spec)))
+
+    calls = " ".join(f"{k}={v}" for k, v in sorted(row["upstream_calls_per_request"].items()))
+    print(f"{row['concurrency']:>5} {row['requests']:>6} {row['throughput_rps']:>7.2f} "
+          f"{fmt(row['latency_p50_s'], '7.2f')} {fmt(row['latency_p95_s'], '7.2f')} "
+          f"{fmt(row['latency_p99_s'], '7.2f')} {fmt(row['error_rate'], '6.1%')} {row['shed_503']:>5} "
+          f"{fmt(row['peak_rss_mb'], '7.1f')} {fmt(row['cpu_percent'], '6.1f')}  {calls}")
+
+
+def _csv(value: str, cast=int):
+    return [cast(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /api/summarize against local mock upstreams")
+    parser.add_argument("--threads", default="8", help="Comma-separated waitress thread counts")
+    parser.add_argument("--workers", default="1", help="Comma-separated server process counts")
+    parser.add_argument("--cache", default="on", help="Comma-separated cache settings (on,off)")
+    parser.add_argument("--concurrency", default="1,2,4,8,16", help="Comma-separated client concurrency ramp")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per concurrency level")
+    parser.add_argument("--topics", type=int, default=50, help="Distinct topics cycled by the clients")
+    parser.add_argument("--profile", help="Settings profile sent with each request (fast, balanced, ...)")
+    parser.add_argument("--mode", help="Pipeline mode sent with each request")
+    parser.add_argument("--timeout", type=float, default=120, help="Client request timeout in seconds")
+    parser.add_argument("--llm-latency", type=float, default=800, help="Median Groq latency (ms)")
+    parser.add_argument("--search-latency", type=float, default=400, help="Median Tavily latency (ms)")
+    parser.add_argument("--news-latency", type=float, default=250, help="Median news site latency (ms)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal sigma of all latencies")
+    parser.add_argument("--llm-errors", type=float, default=0.02, help="Groq error rate (429/500)")
+    parser.add_argument("--search-errors", type=float, default=0.01, help="Tavily error rate (500)")
+    parser.add_argument("--news-errors", type=float, default=0.05, help="News site error rate (403/404)")
+    parser.add_argument("--news-sites", type=int, default=8, help="Distinct mock news domains")
+    parser.add_argument("--env", action="append", default=[], help="Extra server env var, KEY=VALUE (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    upstreams = MockUpstreams(
+        llm=UpstreamProfile(args.llm_latency, args.latency_sigma, args.llm_errors, (429, 500)),
+        search=UpstreamProfile(args.search_latency, args.latency_sigma, args.search_errors, (500,)),
+        news=UpstreamProfile(args.news_latency, args.latency_sigma, args.news_errors, (403, 404)),
+        news_sites=args.news_sites,
+    )
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    topics = [f"{subject} {i}" for i, subject in zip(range(args.topics), itertools.cycle(
+        ["renewable energy policy", "central bank rates", "semiconductor supply", "space launches",
+         "electric vehicle sales", "AI regulation", "global trade talks", "climate summit"]))]
+    body_extra = {k: v for k, v in (("profile", args.profile), ("mode", args.mode)) if v}
+
+    report = []
+    configs = itertools.product(_csv(args.threads), _csv(args.workers), _csv(args.cache, str))
+    try:
+        for threads, workers, cache in configs:
+            config = {"threads": threads, "workers": workers, "cache": cache}
+            if not args.json:
+                print(f"\n== threads={threads} workers={workers} cache={cache} ==")
+                print(f"{'conc':>5} {'reqs':>6} {'ok/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+                      f"{'errors':>6} {'shed':>5} {'rss MB':>7} {'cpu %':>6}  upstream calls/request")
+            app = AppServer(upstreams, threads, workers, cache == "on", extra_env)
+            try:
+                levels = []
+                for concurrency in _csv(args.concurrency):
+                    row = run_level(app, upstreams, concurrency, args.duration, topics, body_extra, args.timeout)
+                    levels.append(row)
+                    if not args.json:
+                        _print_level(row)
+            finally:
+                app.stop()
+            report.append({"config": config, "levels": levels})
+    finally:
+        upstreams.close()
+
+    if args.json:
+        print(json.dumps({
+            "upstreams": {
+                "llm": {"median_ms": args.llm_latency, "error_rate": args.llm_errors},
+                "search": {"median_ms": args.search_latency, "error_rate": args.search_errors},
+                "news": {"median_ms": args.news_latency, "error_rate": args.news_errors,
+                         "sites": args.news_sites},
+                "latency_sigma": args.latency_sigma,
+            },
+            "results": report,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
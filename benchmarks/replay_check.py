@@ -0,0 +1,132 @@
+"""
+Offline replay check.
+
+Runs the agent pipeline (what `run_news_summarizer_agent` wraps) from a recorded
+cassette (utils/cassette.py) with no API keys and with outgoing network connections
+disabled, and fails unless the full report is produced without a single cassette miss:
+
+    python benchmarks/replay_check.py                        # replay the sample cassette
+    python benchmarks/replay_check.py --cassette my-tape --topic "..."
+    python benchmarks/replay_check.py --record               # re-record the sample cassette
+
+`--record` runs the pipeline against the local stand-in Groq, Tavily and news
+servers from load_test.py (no errors injected) and writes a fresh cassette.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import socket
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_CASSETTE = Path(__file__).resolve().parent / "cassettes" / "sample"
+SAMPLE_TOPIC = "renewable energy policy europe"
+
+
+def _disable_network():
+    def refuse(*args, **kwargs):
+        raise OSError("network access is disabled during the replay check")
+    socket.socket.connect = refuse
+    socket.socket.connect_ex = refuse
+    socket.create_connection = refuse
+
+
+def run(topic: str, cassette: Path, mode: str) -> dict:
+    """
+    Run the agent once with the cassette in `mode` ("record" or "replay").
+
+    Returns:
+        dict with 'report', 'articles', 'cassette' stats and 'upstream_calls' (record only)
+    """
+    upstreams = None
+    env = {
+        "CASSETTE_MODE": mode,
+        "CASSETTE_DIR": str(cassette),
+        "CASSETTE_LATENCY_SCALE": "0",
+        # Fresh domain health and no query/search cache, so every call hits the cassette
+        "DOMAIN_HEALTH_PATH": str(Path(tempfile.mkdtemp(prefix="replay-check-")) / "domain_health.json"),
+        "QUERY_CACHE_TTL": "0",
+        "SEARCH_CACHE_TTL": "0",
+    }
+    if mode == "record":
+        sys.path.insert(0, str(Path(__file__).resolve().parent))
+        from load_test import MockUpstreams, UpstreamProfile
+        upstreams = MockUpstreams(
+            llm=UpstreamProfile(20, 0.2, 0, (500,)),
+            search=UpstreamProfile(10, 0.2, 0, (500,)),
+            news=UpstreamProfile(10, 0.2, 0, (403,)),
+            news_sites=4,
+            article_paragraphs=8,
+        )
+        env.update(GROQ_API_KEY="record", TAVILY_API_KEY="record",
+                   GROQ_BASE_URL=upstreams.api_url, TAVILY_API_URL=upstreams.api_url)
+    else:
+        for name in ("GROQ_API_KEY", "TAVILY_API_KEY", "GROQ_BASE_URL", "TAVILY_API_URL"):
+            os.environ.pop(name, None)
+        _disable_network()
+    os.environ.update(env)
+
+    sys.path.insert(0, str(ROOT))
+    from app.app import run_news_summarizer_pipeline
+    from utils.cassette import get_cassette
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_news_summarizer_pipeline(topic, save_to_file=False)
+    finally:
+        if upstreams is not None:
+            upstreams.close()
+
+    return {
+        "success": result.success,
+        "report": result.report,
+        "articles": len(result.articles),
+        "failed": len(result.failed),
+        "cassette": dict(get_cassette().stats),
+        "upstream_calls": dict(upstreams.snapshot()) if upstreams is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the agent offline from a recorded cassette")
+    parser.add_argument("--cassette", default=str(SAMPLE_CASSETTE), help="Cassette directory")
+    parser.add_argument("--topic", default=SAMPLE_TOPIC, help="Topic the cassette was recorded for")
+    parser.add_argument("--record", action="store_true", help="Re-record the cassette against local mock upstreams")
+    args = parser.parse_args()
+
+    cassette = Path(args.cassette)
+    if args.record:
+        shutil.rmtree(cassette, ignore_errors=True)
+        outcome = run(args.topic, cassette, "record")
+        print(f"Recorded {outcome['cassette']['recorded']} interactions to {cassette} "
+              f"({outcome['articles']} articles, upstream calls {outcome['upstream_calls']})")
+        sys.exit(0 if outcome["success"] else 1)
+
+    if not cassette.is_dir():
+        print(f"FAIL: no cassette at {cassette}", file=sys.stderr)
+        sys.exit(1)
+
+    outcome = run(args.topic, cassette, "replay")
+    stats = outcome["cassette"]
+    print(f"Replayed {stats['replayed']} interactions: {outcome['articles']} articles, "
+          f"{outcome['failed']} failed, {stats['missed']} cassette misses")
+
+    failures = []
+    if not outcome["success"]:
+        failures.append("the pipeline did not produce a report")
+    if stats["missed"]:
+        failures.append(f"{stats['missed']} calls were not in the cassette")
+    if not outcome["articles"]:
+        failures.append("no articles were summarized")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+LLM backlog check.
+
+Queues Groq calls in the LLM scheduler (utils/scheduler.py) without touching the
+network and fails unless that backlog shows up where overload decisions are made:
+the groq limiter's waiting count and pressure, `expected_latency("groq")`, the
+degraded mode picked for a request and the article budget's per-article estimate.
+
+    python benchmarks/scheduler_check.py
+    python benchmarks/scheduler_check.py --queued 16 --budget 30
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.overload import MODE_FULL, choose_degraded_mode, expected_latency, get_limiter
+from utils.scheduler import get_scheduler
+
+
+def _snapshot(budget: float) -> dict:
+    from modules.article_budget import ArticleBudget
+    limiter = get_limiter("groq")
+    return {
+        "waiting": limiter.stats()["waiting"],
+        "pressure": round(limiter.pressure(), 2),
+        "expected_latency": round(expected_latency("groq"), 2),
+        "mode": choose_degraded_mode(budget),
+        "article_estimate": round(ArticleBudget(budget, target=5).summary_estimate, 2),
+    }
+
+
+def run(slots: int, queued: int, budget: float) -> dict:
+    """
+    Hold all `slots` groq slots, queue `queued` more calls behind them and compare
+    the overload signals before and while the calls wait.
+    """
+    limiter = get_limiter("groq")
+    limiter.limit = float(slots)
+    scheduler = get_scheduler()
+    before = _snapshot(budget)
+
+    release = threading.Event()
+
+    def call():
+        try:
+            with scheduler.slot(500, timeout=30):
+                release.wait(30)
+        except Exception as e:
+            print(f"⚠️  Queued call failed: {str(e)}")
+
+    threads = [threading.Thread(target=call, daemon=True) for _ in range(slots + queued)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while scheduler.stats()["waiting"]["interactive"] < queued and time.monotonic() < deadline:
+        time.sleep(0.01)
+    during = _snapshot(budget)
+
+    release.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    after = _snapshot(budget)
+    return {"before": before, "during": during, "after": after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that queued LLM calls count as groq backlog")
+    parser.add_argument("--slots", type=int, default=2, help="Groq concurrency limit to hold")
+    parser.add_argument("--queued", type=int, default=8, help="Calls queued behind the held slots")
+    parser.add_argument("--budget", type=float, default=45, help="Latency budget for the mode choice (seconds)")
+    args = parser.parse_args()
+
+    outcome = run(args.slots, args.queued, args.budget)
+    for phase in ("before", "during", "after"):
+        print(f"{phase:>7}: {outcome[phase]}")
+
+    before, during, after = outcome["before"], outcome["during"], outcome["after"]
+    failures = []
+    if during["waiting"] < args.queued:
+        failures.append(f"groq limiter shows {during['waiting']} waiting, expected {args.queued}")
+    if during["pressure"] <= 1.0:
+        failures.append("groq pressure did not rise above 1.0")
+    if during["expected_latency"] <= before["expected_latency"]:
+        failures.append("expected groq latency ignored the backlog")
+    if before["mode"] == MODE_FULL and during["mode"] == MODE_FULL:
+        failures.append("degraded mode stayed 'full' with calls queued")
+    if during["article_estimate"] <= before["article_estimate"]:
+        failures.append("article budget estimate ignored the backlog")
+    if after["waiting"] != 0:
+        failures.append(f"{after['waiting']} calls still counted as waiting after the backlog drained")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
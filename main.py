@@ -4,18 +4,46 @@ Smart News Summarizer Agent - Flask REST API
 REST API interface for the news summarizer agent
 """
 
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
+import os
 import sys
 from pathlib import Path
+from dataclasses import asdict
 from datetime import datetime
+import hmac
+import math
+import time
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-run_news_summarizer_agent = None
+from utils.overload import (
+    AdmissionController, choose_degraded_mode, backend_stats,
+    PIPELINE_LATENCY_BUDGET, DEGRADED_MODES, MODE_FULL, MODE_EXTRACTIVE, MODE_CACHED
+)
+from utils.tracing import start_trace, current_trace_id, parse_traceparent
+from utils.config import load_settings, use_settings, get_settings, available_profiles
+from utils.scheduler import (
+    get_scheduler, resolve_tenant, resolve_priority, use_tenant, PRIORITY_BATCH
+)
+
+run_news_summarizer_pipeline = None
 generate_html_report = None
+iter_html_report = None
+
+# Serve a stored report no older than this when the pipeline is too slow (seconds)
+CACHED_REPORT_MAX_AGE = float(os.getenv('CACHED_REPORT_MAX_AGE', '21600'))
+
+# API key that may read every tenant's usage (GET /api/usage); unset = no all-tenant view
+ADMIN_API_KEY = os.getenv('ADMIN_API_KEY', '')
+
+# Response fields clients can ask for with "fields" (default: everything but the structured parts)
+RESPONSE_FIELDS = ('report', 'report_html', 'stats', 'trace_id', 'report_id', 'degraded_mode',
+                   'executive_summary', 'articles', 'budget')
+DEFAULT_RESPONSE_FIELDS = ('report', 'report_html', 'stats', 'trace_id', 'report_id', 'degraded_mode')
 
 app = Flask(__name__)
+admission = AdmissionController()
 
 HTML_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
@@ -279,6 +307,101 @@ HTML_TEMPLATE = """<!DOCTYPE html>
 </html>"""
 
 
+def _load_pipeline():
+    """
+    Import the agent pipeline on first use (or at startup with NEWS_AGENT_PRELOAD=1).
+
+    Returns True if the real pipeline is loaded; otherwise requests get the demo report.
+    """
+    global run_news_summarizer_pipeline, generate_html_report, iter_html_report
+    if run_news_summarizer_pipeline is None:
+        try:
+            from app.app import run_news_summarizer_pipeline as _r
+            run_news_summarizer_pipeline = _r
+        except Exception as e:
+            print(f"❌ Could not import the pipeline, serving demo reports: {type(e).__name__}: {str(e)}")
+
+    if generate_html_report is None:
+        try:
+            from modules.report_generator import generate_html_report as _g, iter_html_report as _i
+            generate_html_report = _g
+            iter_html_report = _i
+        except Exception as e:
+            print(f"❌ Could not import the HTML report renderer: {type(e).__name__}: {str(e)}")
+
+    return run_news_summarizer_pipeline is not None
+
+
+# Import the pipeline while the server starts instead of on the first request
+if os.getenv('NEWS_AGENT_PRELOAD') == '1':
+    _load_pipeline()
+
+
+def _response_fields(value):
+    """Parse the "fields" selection (list or comma-separated string)"""
+    if not value:
+        return set(DEFAULT_RESPONSE_FIELDS)
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        raise ValueError('fields must be a list or comma-separated string')
+    fields = {str(f).strip() for f in value if str(f).strip()}
+    unknown = fields - set(RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def _latency_budget(value):
+    """Parse the "latency_budget" field (seconds, > 0; default PIPELINE_LATENCY_BUDGET)"""
+    if value is None or value == '':
+        return PIPELINE_LATENCY_BUDGET
+    try:
+        budget = float(value) if not isinstance(value, bool) else None
+    except (TypeError, ValueError):
+        budget = None
+    if budget is None or not math.isfinite(budget) or budget <= 0:
+        raise ValueError('latency_budget must be a positive number of seconds')
+    return budget
+
+
+def _parse_report_stats(report):
+    """Parse stats lines out of a plain-text report (used for the demo report)"""
+    lines = report.split('\n') if isinstance(report, str) else []
+    stats = {'total': 0, 'processed': 0, 'failed': 0, 'success_rate': 0}
+
+    for line in lines:
+        try:
+            if 'Total Articles Found:' in line:
+                parts = line.split(':')
+                if len(parts) > 1:
+                    num_str = ''.join(c for c in parts[1] if c.isdigit())
+                    if num_str:
+                        stats['total'] = int(num_str)
+            elif 'Successfully Processed:' in line:
+                parts = line.split(':')
+                if len(parts) > 1:
+                    num_str = ''.join(c for c in parts[1] if c.isdigit())
+                    if num_str:
+                        stats['processed'] = int(num_str)
+            elif 'Failed to Process:' in line:
+                parts = line.split(':')
+                if len(parts) > 1:
+                    num_str = ''.join(c for c in parts[1] if c.isdigit())
+                    if num_str:
+                        stats['failed'] = int(num_str)
+            elif 'Success Rate:' in line:
+                parts = line.split(':')
+                if len(parts) > 1:
+                    num_str = ''.join(c for c in parts[1] if c.isdigit() or c == '.')
+                    if num_str:
+                        stats['success_rate'] = float(num_str)
+        except (ValueError, IndexError):
+            continue
+
+    return stats
+
+
 @app.route('/', methods=['GET'])
 def index():
     """Render the web UI"""
@@ -296,84 +419,242 @@ def summarize():
         data = request.get_json() or {}
         topic = (data.get('topic') or '').strip()
         style = data.get('style', 'corporate')
+        speculative = bool(data.get('speculative', False))
+        stream_html = data.get('format') == 'html'
 
         if not topic:
             return jsonify({'success': False, 'error': 'Topic is required'}), 400
 
-        global run_news_summarizer_agent, generate_html_report
-        if run_news_summarizer_agent is None:
-            try:
-                from app.app import run_news_summarizer_agent as _r
-                run_news_summarizer_agent = _r
-            except Exception:
-                pass
-
-        if generate_html_report is None:
+        # Only build and send what the client asked for
+        try:
+            fields = _response_fields(data.get('fields') or request.args.get('fields'))
+            latency_budget = _latency_budget(data.get('latency_budget'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        # Tenant from the API key; "priority" can lower a request to batch
+        tenant = resolve_tenant(request.headers.get('X-API-Key'))
+
+        # Per-request profile ("fast", "balanced", "thorough", ...; default: the tenant's) and overrides
+        overrides = data.get('settings') or {}
+        if not isinstance(overrides, dict):
+            return jsonify({'success': False, 'error': 'settings must be an object'}), 400
+        try:
+            settings = load_settings(data.get('profile') or tenant.profile, overrides)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        try:
+            priority = resolve_priority(tenant, data.get('priority'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        batch = priority == PRIORITY_BATCH
+
+        retry_after = get_scheduler().check_request(tenant)
+        if retry_after is not None:
+            response = jsonify({'success': False, 'error': 'Request quota exceeded, please retry later'})
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+
+        trace_id = parse_traceparent(request.headers.get('traceparent'))
+        with start_trace('POST /api/summarize', trace_id=trace_id, topic=topic,
+                         tenant=tenant.name, priority=priority) as root:
+            # Load shedding: wait for a pipeline slot or reject with 503
+            queue_time = admission.enter(batch=batch)
+            if queue_time is None:
+                root.set(shed=True)
+                response = jsonify({'success': False, 'error': 'Server overloaded, please retry later'})
+                response.headers['Retry-After'] = str(admission.retry_after())
+                response.headers['X-Trace-Id'] = root.trace.trace_id
+                return response, 503
+
+            root.set(queue_time=round(queue_time, 3))
+            started = time.monotonic()
             try:
-                from modules.report_generator import generate_html_report as _g
-                generate_html_report = _g
-            except Exception:
-                pass
-
-        if run_news_summarizer_agent is None:
-            report = (
-                f"Demo Report for: {topic}\n\n"
-                "Total Articles Found: 3\n"
-                "Successfully Processed: 3\n"
-                "Failed to Process: 0\n"
-                "Success Rate: 100.0\n\n"
-                "Article 1: Example News One - Brief summary of the article.\n"
-                "Article 2: Example News Two - Brief summary of the article.\n"
-                "Article 3: Example News Three - Brief summary of the article.\n"
-            )
-        else:
-            report = run_news_summarizer_agent(topic, save_to_file=True)
+                with use_settings(settings), use_tenant(tenant, priority):
+                    response = app.make_response(_summarize(topic, style, speculative, stream_html, fields, data,
+                                                          latency_budget - queue_time))
+                response.headers['X-Trace-Id'] = root.trace.trace_id
+                return response
+            finally:
+                admission.leave(time.monotonic() - started, batch=batch)
 
-        report_html = None
-        if generate_html_report is not None:
-            try:
-                report_html = generate_html_report(report, style=style)
-            except Exception:
-                pass
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        lines = report.split('\n') if isinstance(report, str) else []
-        stats = {'total': 0, 'processed': 0, 'failed': 0, 'success_rate': 0}
 
-        for line in lines:
+def _summarize(topic, style, speculative, stream_html, fields, data, budget):
+    """Run the pipeline (or a degraded variant) for one admitted request within `budget` seconds"""
+    _load_pipeline()
+
+    # Pick the pipeline mode from the remaining latency budget (or honour an explicit one)
+    mode = MODE_EXTRACTIVE if data.get('fast') else data.get('mode')
+    if mode not in DEGRADED_MODES:
+        mode = choose_degraded_mode(budget, articles=get_settings().max_articles)
+
+    result = None
+    report_id = None
+    if mode == MODE_CACHED:
+        try:
+            from modules.report_store import get_report_store
+            result = get_report_store().latest_for_topic(topic, max_age_seconds=CACHED_REPORT_MAX_AGE)
+        except Exception as e:
+            print(f"❌ Error reading cached report: {str(e)}")
+        if result is not None:
+            result.mode = MODE_CACHED
+            report_id = result.report_id
+        else:
+            # Nothing cached for this topic: cheapest live mode instead
+            mode = MODE_EXTRACTIVE
+
+    if result is not None:
+        report = result.report
+        stats = result.stats()
+    elif run_news_summarizer_pipeline is None:
+        report = (
+            f"Demo Report for: {topic}\n\n"
+            "Total Articles Found: 3\n"
+            "Successfully Processed: 3\n"
+            "Failed to Process: 0\n"
+            "Success Rate: 100.0\n\n"
+            "Article 1: Example News One - Brief summary of the article.\n"
+            "Article 2: Example News Two - Brief summary of the article.\n"
+            "Article 3: Example News Three - Brief summary of the article.\n"
+        )
+        stats = _parse_report_stats(report)
+    else:
+        # The remaining latency budget is the pipeline's SLO: it adapts how many articles it fetches
+        result = run_news_summarizer_pipeline(topic, save_to_file=False, speculative=speculative, mode=mode,
+                                              slo=max(budget, 1.0))
+        report = result.report
+        stats = result.stats()
+        if result.success:
             try:
-                if 'Total Articles Found:' in line:
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        num_str = ''.join(c for c in parts[1] if c.isdigit())
-                        if num_str:
-                            stats['total'] = int(num_str)
-                elif 'Successfully Processed:' in line:
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        num_str = ''.join(c for c in parts[1] if c.isdigit())
-                        if num_str:
-                            stats['processed'] = int(num_str)
-                elif 'Failed to Process:' in line:
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        num_str = ''.join(c for c in parts[1] if c.isdigit())
-                        if num_str:
-                            stats['failed'] = int(num_str)
-                elif 'Success Rate:' in line:
-                    parts = line.split(':')
-                    if len(parts) > 1:
-                        num_str = ''.join(c for c in parts[1] if c.isdigit() or c == '.')
-                        if num_str:
-                            stats['success_rate'] = float(num_str)
-            except (ValueError, IndexError):
-                continue
-
-        resp = {'success': True, 'report': report, 'stats': stats}
+                from modules.report_store import get_report_store
+                report_id = get_report_store().save(result)
+            except Exception as e:
+                print(f"❌ Error storing report: {str(e)}")
+
+    # Stream the HTML rendering straight from the structured data
+    if stream_html and result is not None and result.success and iter_html_report is not None:
+        return Response(stream_with_context(iter_html_report(result, style=style)), mimetype='text/html')
+
+    resp = {'success': True}
+    if 'report' in fields:
+        resp['report'] = report
+    if 'stats' in fields:
+        resp['stats'] = stats
+    if 'trace_id' in fields:
+        resp['trace_id'] = current_trace_id()
+    if 'report_html' in fields:
+        report_html = None
+        try:
+            if result is not None and result.success and iter_html_report is not None:
+                report_html = ''.join(iter_html_report(result, style=style))
+            elif generate_html_report is not None:
+                report_html = generate_html_report(report, style=style)
+        except Exception:
+            pass
         if report_html:
             resp['report_html'] = report_html
+    if 'report_id' in fields and report_id:
+        resp['report_id'] = report_id
+    if result is not None:
+        if 'degraded_mode' in fields and result.mode != MODE_FULL:
+            resp['degraded_mode'] = result.mode
+        if 'executive_summary' in fields:
+            resp['executive_summary'] = result.executive_summary
+        if 'articles' in fields:
+            resp['articles'] = [article.to_dict() for article in result.articles]
+        if 'budget' in fields and result.budget is not None:
+            resp['budget'] = result.budget
+
+    return jsonify(resp), 200
+
+
+@app.route('/api/reports', methods=['GET'])
+def list_reports():
+    """List stored reports, filtered by topic/date or full-text query"""
+    try:
+        from modules.report_store import get_report_store
+        store = get_report_store()
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        q = (request.args.get('q') or '').strip()
+        if q:
+            reports = store.search(q, limit=limit, offset=offset)
+        else:
+            reports = store.list(
+                topic=request.args.get('topic'),
+                since=request.args.get('since'),
+                until=request.args.get('until'),
+                limit=limit,
+                offset=offset
+            )
+        return jsonify({'success': True, 'reports': reports}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 
-        return jsonify(resp), 200
+@app.route('/api/reports/<report_id>', methods=['GET'])
+def get_report(report_id):
+    """Fetch one stored report as JSON, or as HTML with ?format=html"""
+    try:
+        from modules.report_store import get_report_store
+        record = get_report_store().get(report_id)
+        if record is None:
+            return jsonify({'success': False, 'error': 'Report not found'}), 404
+
+        if request.args.get('format') == 'html':
+            from modules.report_generator import iter_html_report as _i
+            style = request.args.get('style', 'corporate')
+            return Response(stream_with_context(_i(record, style=style)), mimetype='text/html')
+
+        return jsonify({'success': True, 'report': {
+            'id': record.report_id,
+            'topic': record.topic,
+            'query': record.query,
+            'created_at': record.generated_at.isoformat(),
+            'report': record.report,
+            'executive_summary': record.executive_summary,
+            'articles': [article.to_dict() for article in record.articles],
+            'failed': record.failed
+        }}), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
+
+@app.route('/api/profiles', methods=['GET'])
+def profiles():
+    """List settings profiles and the deployment default settings"""
+    try:
+        return jsonify({
+            'success': True,
+            'profiles': available_profiles(),
+            'default': asdict(get_settings())
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/usage', methods=['GET'])
+def usage():
+    """Usage, quotas and scheduler queue state for the caller's tenant (all tenants with the admin key)"""
+    try:
+        api_key = request.headers.get('X-API-Key') or ''
+        requested = request.args.get('tenant')
+        if ADMIN_API_KEY and hmac.compare_digest(api_key.encode(), ADMIN_API_KEY.encode()):
+            tenants = get_scheduler().usage(requested)
+        else:
+            tenant = resolve_tenant(api_key)
+            if requested and requested != tenant.name:
+                return jsonify({'success': False, 'error': 'Not allowed to read other tenants'}), 403
+            tenants = get_scheduler().usage(tenant.name)
+        return jsonify({
+            'success': True,
+            'tenants': tenants,
+            'scheduler': get_scheduler().stats()
+        }), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -381,7 +662,14 @@ def summarize():
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat(), 'version': '1.0'}), 200
+    return jsonify({
+        'status': 'healthy',
+        'timestamp': datetime.now().isoformat(),
+        'version': '1.0',
+        'load': admission.stats(),
+        'backends': backend_stats(),
+        'llm_scheduler': get_scheduler().stats()
+    }), 200
 
 
 @app.route('/api/info', methods=['GET'])
@@ -394,7 +682,11 @@ def info():
         'endpoints': {
             'GET /': 'Web UI',
             'POST /api/summarize': 'Summarize news',
+            'GET /api/reports': 'List/search stored reports (topic, since, until, q, limit, offset)',
+            'GET /api/reports/<id>': 'Fetch a stored report (format=html for HTML)',
             'GET /api/health': 'Health check',
+            'GET /api/profiles': 'Available pipeline settings profiles',
+            'GET /api/usage': 'Usage and quotas of the X-API-Key tenant (all tenants with the admin key)',
             'GET /api/info': 'API information'
         }
     }), 200
@@ -0,0 +1,157 @@
+"""
+Article Budget Controller
+Decides, article by article, how much of a pipeline's latency SLO can still be spent
+on fetching and summarizing. Estimates combine per-domain fetch latency and success
+history (domain health), the observed Groq latency and the article latencies seen so
+far in this run. Every decision is recorded so it can be returned with the result.
+"""
+
+import time
+from statistics import median
+from typing import Dict, List, Optional
+
+from modules.domain_health import get_domain_registry
+from utils.overload import expected_latency
+
+# Domains below this success rate are skipped when the budget is tight
+UNRELIABLE_SUCCESS_RATE = 0.3
+# Shortest fetch timeout worth attempting (seconds)
+MIN_FETCH_TIMEOUT = 1.0
+
+
+class ArticleBudget:
+    """
+    Latency-SLO controller for the article stage.
+
+    Args:
+        slo (float): End-to-end latency target for the pipeline (seconds)
+        target (int): Articles wanted in the report
+        started (float): `time.monotonic()` when the pipeline started
+        extractive (bool): Articles are summarized locally (no LLM call per article)
+        executive_summary (bool): The report stage will want an LLM executive summary
+        min_articles (int): Articles to attempt (successful or not) before the budget applies,
+            as long as the SLO has not already passed
+        summary_rounds (float): Expected sequential LLM rounds per article summary (more
+            than 1 when long articles go through the map-reduce chunk path)
+    """
+
+    def __init__(self, slo: float, target: int, started: Optional[float] = None,
+                 extractive: bool = False, executive_summary: bool = True, min_articles: int = 1,
+                 summary_rounds: float = 1.0):
+        self.slo = slo
+        self.target = target
+        self.started = time.monotonic() if started is None else started
+        self.deadline = self.started + slo
+        self.min_articles = min_articles
+        self.summary_estimate = 0.1 if extractive else expected_latency("groq") * summary_rounds
+        self.processed = 0
+        self.failed = 0
+        self.stop_reason = None
+        self.wants_executive = executive_summary
+        self.executive = None
+        self.decisions: List[Dict] = []
+        self._observed: List[float] = []
+        self._registry = get_domain_registry()
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def estimate(self, url: str) -> float:
+        """
+        Expected seconds to fetch and summarize one article from `url`.
+        """
+        fetch = self._registry.median_latency(url) or expected_latency("fetch")
+        estimate = fetch + self.summary_estimate
+        if self._observed:
+            # Lean on what this run has actually seen
+            estimate = 0.5 * estimate + 0.5 * median(self._observed)
+        return estimate
+
+    def _report_reserve(self) -> float:
+        return expected_latency("groq") if self.wants_executive else 0.1
+
+    def admit(self, url: str, max_timeout: float) -> Optional[float]:
+        """
+        Decide whether to process `url`.
+
+        Args:
+            url (str): Candidate article URL
+            max_timeout (float): Configured fetch timeout (upper bound)
+
+        Returns:
+            float: Fetch timeout to use, or None to skip the article
+        """
+        remaining = self.remaining()
+        estimate = self.estimate(url)
+        decision = {"url": url, "estimate_s": round(estimate, 2), "remaining_s": round(remaining, 2)}
+
+        reason = None
+        if self.processed >= self.target:
+            reason = "target_reached"
+        elif remaining <= 0:
+            reason = "over_budget"
+        elif self.processed + self.failed >= self.min_articles:
+            available = remaining - self._report_reserve()
+            if available < estimate:
+                reason = "over_budget"
+            elif available < 2 * estimate and self._registry.success_rate(url) < UNRELIABLE_SUCCESS_RATE:
+                reason = "unreliable_domain"
+
+        if reason:
+            decision.update(action="skip", reason=reason)
+            self.decisions.append(decision)
+            if reason != "unreliable_domain":
+                self.stop_reason = self.stop_reason or reason
+            return None
+
+        timeout = max(MIN_FETCH_TIMEOUT, min(max_timeout, remaining - self.summary_estimate - self._report_reserve()))
+        decision.update(action="process", timeout_s=round(timeout, 1))
+        self.decisions.append(decision)
+        return timeout
+
+    def observe(self, url: str, elapsed: float, success: bool):
+        """
+        Record the outcome of an admitted article.
+        """
+        self._observed.append(elapsed)
+        if success:
+            self.processed += 1
+        else:
+            self.failed += 1
+        for decision in reversed(self.decisions):
+            if decision["url"] == url and decision["action"] == "process":
+                decision.update(elapsed_s=round(elapsed, 2), success=success)
+                break
+
+    def allow_executive_summary(self) -> bool:
+        """
+        Whether the LLM executive summary still fits in the remaining budget.
+        """
+        self.executive = self.remaining() >= expected_latency("groq")
+        return self.executive
+
+    def summary(self, candidates: int, backups: int, skipped: int) -> Dict:
+        """
+        The controller's decisions, for the pipeline result.
+
+        Args:
+            candidates (int): Selected article URLs
+            backups (int): Extra URLs available to replace failed or skipped ones
+            skipped (int): Selected URLs that were never attempted
+        """
+        return {
+            "slo_s": round(self.slo, 2),
+            "target_articles": self.target,
+            "candidates": candidates,
+            "backups": backups,
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": skipped,
+            "stop_reason": self.stop_reason or ("target_reached" if self.processed >= self.target
+                                                else "candidates_exhausted"),
+            "executive_summary": ("not_requested" if not self.wants_executive
+                                  else "not_reached" if self.executive is None
+                                  else "included" if self.executive else "skipped_for_budget"),
+            "elapsed_s": round(time.monotonic() - self.started, 2),
+            "decisions": self.decisions,
+        }
@@ -0,0 +1,219 @@
+"""
+Per-Domain Health Tracking
+Remembers how article fetches went for each publisher domain (success rate,
+median latency, failure reasons) and circuit-breaks domains that keep failing.
+Counts decay over time so a domain that recovers is retried.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from statistics import median
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+DOMAIN_HEALTH_PATH = os.getenv("DOMAIN_HEALTH_PATH", "domain_health.json")
+# Success/failure counts halve every this many seconds
+DOMAIN_HEALTH_HALF_LIFE = float(os.getenv("DOMAIN_HEALTH_HALF_LIFE", str(24 * 3600)))
+# Consecutive domain-level failures that open the circuit
+DOMAIN_FAILURE_THRESHOLD = int(os.getenv("DOMAIN_FAILURE_THRESHOLD", "3"))
+# How long an open circuit skips the domain before a single retry is allowed
+DOMAIN_COOLDOWN_SECONDS = float(os.getenv("DOMAIN_COOLDOWN_SECONDS", str(6 * 3600)))
+
+# Failure reasons that say something about the domain rather than one URL
+DOMAIN_LEVEL_REASONS = {"forbidden", "timeout", "thin_content", "spam", "error"}
+
+_MAX_LATENCIES = 20
+_SAVE_INTERVAL = 5.0
+
+
+def domain_of(url: str) -> str:
+    """
+    Return the normalized host of a URL ("www." stripped).
+    """
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def classify_fetch_error(error: Exception) -> str:
+    """
+    Map a fetch exception to a failure reason.
+    """
+    error_msg = str(error).lower()
+    if "404" in error_msg or "not found" in error_msg:
+        return "not_found"
+    if "403" in error_msg or "forbidden" in error_msg:
+        return "forbidden"
+    if "timeout" in error_msg or "timed out" in error_msg:
+        return "timeout"
+    return "error"
+
+
+class DomainHealthRegistry:
+    """
+    Thread-safe registry of per-domain fetch outcomes, persisted as JSON.
+
+    Args:
+        path (Optional[str]): JSON file to load from and save to (None keeps it in memory)
+        half_life (float): Seconds after which success/failure counts are halved
+        failure_threshold (int): Consecutive domain-level failures that open the circuit
+        cooldown (float): Seconds an open circuit blocks the domain
+    """
+
+    def __init__(self, path: Optional[str] = DOMAIN_HEALTH_PATH, half_life: float = DOMAIN_HEALTH_HALF_LIFE,
+                 failure_threshold: int = DOMAIN_FAILURE_THRESHOLD, cooldown: float = DOMAIN_COOLDOWN_SECONDS):
+        self.path = path
+        self.half_life = half_life
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._domains = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._domains = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not load domain health from {self.path}: {str(e)}")
+            self._domains = {}
+
+    def _save_locked(self, force: bool = False):
+        now = time.time()
+        if not self.path or (not force and now - self._last_save < _SAVE_INTERVAL):
+            return
+        self._last_save = now
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._domains, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️  Could not save domain health to {self.path}: {str(e)}")
+
+    def flush(self):
+        """
+        Write the registry to disk now.
+        """
+        with self._lock:
+            self._save_locked(force=True)
+
+    def _entry(self, domain: str, now: float) -> Dict:
+        entry = self._domains.get(domain)
+        if entry is None:
+            entry = {
+                "success": 0.0, "failure": 0.0, "latencies": [], "reasons": {},
+                "consecutive_failures": 0, "updated": now, "open_until": 0.0,
+            }
+            self._domains[domain] = entry
+        else:
+            # Exponential decay of the counts since the last update
+            factor = 0.5 ** (max(now - entry["updated"], 0.0) / self.half_life)
+            entry["success"] *= factor
+            entry["failure"] *= factor
+            entry["updated"] = now
+        return entry
+
+    def record_success(self, url: str, latency: float):
+        """
+        Record a successful fetch and close the domain's circuit.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entry(domain_of(url), now)
+            entry["success"] += 1
+            entry["consecutive_failures"] = 0
+            entry["open_until"] = 0.0
+            entry["latencies"] = (entry["latencies"] + [round(latency, 3)])[-_MAX_LATENCIES:]
+            self._save_locked()
+
+    def record_failure(self, url: str, reason: str, latency: Optional[float] = None):
+        """
+        Record a failed fetch; domain-level failures can open the circuit.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entry(domain_of(url), now)
+            entry["failure"] += 1
+            entry["reasons"][reason] = entry["reasons"].get(reason, 0) + 1
+            if latency is not None:
+                entry["latencies"] = (entry["latencies"] + [round(latency, 3)])[-_MAX_LATENCIES:]
+            if reason in DOMAIN_LEVEL_REASONS:
+                entry["consecutive_failures"] += 1
+                if entry["consecutive_failures"] >= self.failure_threshold:
+                    entry["open_until"] = now + self.cooldown
+            self._save_locked()
+
+    def is_blocked(self, url: str) -> bool:
+        """
+        True while the domain's circuit is open. Once the cooldown passes one
+        attempt is let through; another failure re-opens the circuit.
+        """
+        with self._lock:
+            entry = self._domains.get(domain_of(url))
+            return bool(entry) and entry["open_until"] > time.time()
+
+    def success_rate(self, url: str) -> float:
+        """
+        Decayed success rate with a neutral prior, so unknown domains score 0.5.
+        """
+        with self._lock:
+            entry = self._domains.get(domain_of(url))
+            if not entry:
+                return 0.5
+            factor = 0.5 ** (max(time.time() - entry["updated"], 0.0) / self.half_life)
+            success = entry["success"] * factor
+            failure = entry["failure"] * factor
+            return (success + 1) / (success + failure + 2)
+
+    def median_latency(self, url: str) -> Optional[float]:
+        with self._lock:
+            entry = self._domains.get(domain_of(url))
+            if not entry or not entry["latencies"]:
+                return None
+            return median(entry["latencies"])
+
+    def prioritize(self, urls: List[str]) -> List[str]:
+        """
+        Drop URLs on circuit-broken domains and order the rest healthiest first
+        (ties keep their original order).
+        """
+        allowed = [u for u in urls if not self.is_blocked(u)]
+        return sorted(allowed, key=lambda u: -self.success_rate(u))
+
+    def snapshot(self) -> Dict:
+        """
+        Per-domain summary for reporting.
+        """
+        with self._lock:
+            domains = list(self._domains.items())
+        summary = {}
+        for domain, entry in domains:
+            summary[domain] = {
+                "success_rate": round((entry["success"] + 1) / (entry["success"] + entry["failure"] + 2), 3),
+                "median_latency": median(entry["latencies"]) if entry["latencies"] else None,
+                "reasons": dict(entry["reasons"]),
+                "circuit_open": entry["open_until"] > time.time(),
+            }
+        return summary
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_domain_registry() -> DomainHealthRegistry:
+    """
+    Return the shared domain health registry, loading it from disk on first use.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DomainHealthRegistry()
+            atexit.register(_registry.flush)
+        return _registry
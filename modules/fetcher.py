@@ -0,0 +1,128 @@
+"""
+Bounded Article Download
+Streams article pages instead of reading whole response bodies into memory.
+Rejects non-HTML content and oversized responses up front, and stops reading
+once enough paragraph text has been seen (parsed incrementally with lxml).
+Downloads can be recorded/replayed by the cassette layer (utils/cassette.py).
+"""
+
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from bs4 import UnicodeDammit
+from lxml import etree
+
+from utils.cassette import get_cassette, client_error
+
+ALLOWED_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain", "")
+_CHUNK_SIZE = 16 * 1024
+_TEXT_TAGS = {"p", "h1", "h2", "h3", "li", "blockquote"}
+
+
+class FetchRejected(Exception):
+    """Raised when a response is refused before or while downloading it."""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _raise_recorded_error(error: Dict):
+    if error["type"] == "FetchRejected":
+        raise FetchRejected(error["message"], (error.get("data") or {}).get("reason", "rejected"))
+
+
+def _deterministic_error(error: Exception) -> bool:
+    # Missed deadlines depend on the run's budget, not on the page
+    if isinstance(error, FetchRejected):
+        return error.reason != "deadline"
+    return client_error(error)
+
+
+def stream_download(url: str, timeout: float, max_bytes: int, text_target: int,
+                    user_agent: str = "Mozilla/5.0", deadline: Optional[float] = None) -> Tuple[str, int]:
+    """
+    Download at most `max_bytes` of an HTML page, stopping early once the page has
+    yielded `text_target` characters of paragraph text.
+
+    Args:
+        url (str): Page URL
+        timeout (float): Connect/read timeout in seconds
+        max_bytes (int): Hard cap on bytes read from the response body
+        text_target (int): Stop once this many characters of text were parsed
+        user_agent (str): User-Agent header
+        deadline (float): Optional `time.monotonic()` by which the whole download must
+            finish; `timeout` alone only bounds each socket read
+
+    Returns:
+        Tuple[str, int]: (decoded HTML, number of bytes read)
+
+    Raises:
+        FetchRejected: Unsupported content type, declared length over `max_bytes`
+            or the deadline passed mid-download
+        requests.RequestException: Network/HTTP errors (e.g. 403, 404, timeouts)
+    """
+    return get_cassette().call(
+        "download",
+        {"url": url, "max_bytes": max_bytes, "text_target": text_target},
+        lambda: _stream_download(url, timeout, max_bytes, text_target, user_agent, deadline),
+        encode=lambda result: {"html": result[0], "bytes": result[1]},
+        decode=lambda data: (data["html"], data["bytes"]),
+        encode_error=lambda e: {"reason": e.reason} if isinstance(e, FetchRejected) else None,
+        decode_error=_raise_recorded_error,
+        record_error=_deterministic_error,
+    )
+
+
+def _stream_download(url: str, timeout: float, max_bytes: int, text_target: int,
+                     user_agent: str, deadline: Optional[float] = None) -> Tuple[str, int]:
+    if deadline is not None:
+        timeout = min(timeout, max(deadline - time.monotonic(), 0.1))
+    with requests.get(url, stream=True, timeout=timeout, headers={"User-Agent": user_agent}) as response:
+        response.raise_for_status()
+
+        content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            raise FetchRejected(f"unsupported content type {content_type}", "unsupported_type")
+
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise FetchRejected(f"response too large ({declared} bytes)", "too_large")
+
+        parser = etree.HTMLPullParser(events=("start", "end"))
+        chunks = []
+        received = 0
+        text_chars = 0
+        open_text_tags = 0
+        for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+            if deadline is not None and time.monotonic() > deadline:
+                # A slow-dripping server can keep every read under `timeout` indefinitely
+                raise FetchRejected(f"download deadline passed after {received} bytes", "deadline")
+            if not chunk:
+                continue
+            chunk = chunk[:max_bytes - received]
+            chunks.append(chunk)
+            received += len(chunk)
+
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                is_text_tag = isinstance(element.tag, str) and element.tag.lower() in _TEXT_TAGS
+                if event == "start":
+                    open_text_tags += is_text_tag
+                    continue
+                if open_text_tags:
+                    # Only the element's own text and its children's tails: nested
+                    # elements were counted (and cleared) at their own end events
+                    text_chars += len(element.text or "")
+                    text_chars += sum(len(child.tail or "") for child in element)
+                open_text_tags -= is_text_tag
+                # Drop the parsed subtree; the tail belongs to the parent and is counted there
+                element.clear(keep_tail=True)
+
+            if text_chars >= text_target or received >= max_bytes:
+                break
+
+    raw = b"".join(chunks)
+    html = UnicodeDammit(raw, is_html=True).unicode_markup or raw.decode("utf-8", errors="replace")
+    return html, received
@@ -1,8 +1,18 @@
-from groq import Groq
-from langchain_core.prompts import PromptTemplate
-from utils.api_keys import get_groq_key
+"""
+Module 1: Query Generation
+Turns a user topic into a news search query.
+Short or common topics are rewritten locally; the LLM is only used when it adds value,
+and every generated query is memoized per normalized topic.
+"""
 
-client = Groq(api_key=get_groq_key())
+import os
+import re
+import threading
+import time
+
+from langchain_core.prompts import PromptTemplate
+from utils.cache import TTLCache
+from utils.llm import complete, valid_query
 
 query_prompt = PromptTemplate(
     input_variables=["topic"],
@@ -12,18 +22,142 @@ Return ONLY the search query.
 """
 )
 
+# Topics with at most this many content words are rewritten locally
+SHORT_TOPIC_WORDS = int(os.getenv("QUERY_SHORT_TOPIC_WORDS", "3"))
+# Maximum LLM query generations per minute before falling back to the local rewriter
+LLM_QUERIES_PER_MINUTE = int(os.getenv("QUERY_LLM_PER_MINUTE", "30"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "21600"))
+
+STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "on", "in", "to", "for", "about", "with",
+    "what", "whats", "is", "are", "was", "were", "tell", "me", "give", "show",
+    "find", "news", "update", "updates", "please", "any", "some",
+}
+# Kept in rewritten queries (they carry the user's recency intent) but ignored when comparing topics
+RECENCY_WORDS = {"latest", "recent", "today", "breaking", "new", "2024", "2025", "2026"}
+
+# Shared topic -> query cache so repeated topics skip the LLM round-trip
+_query_cache = TTLCache(ttl=QUERY_CACHE_TTL, maxsize=2048)
+
+_llm_calls = []
+_llm_calls_lock = threading.Lock()
+
+
+def normalize_topic(topic: str) -> str:
+    """
+    Normalize a topic for cache lookups (lowercase, collapsed whitespace).
+    """
+    return " ".join(topic.lower().split())
+
+
+def get_cached_query(topic: str):
+    """
+    Return a previously generated query for this topic, or None.
+    """
+    return _query_cache.get(normalize_topic(topic))
+
+
+def query_similarity(a: str, b: str) -> float:
+    """
+    Jaccard similarity between the content words of two queries (0.0 - 1.0).
+    
+    Filler and recency words ("news", "latest", ...) are ignored, so "Tesla" and
+    "Tesla latest news" count as the same query.
+    """
+    words_a = set(re.findall(r"\w+", a.lower()))
+    words_b = set(re.findall(r"\w+", b.lower()))
+    content_a = words_a - STOPWORDS - RECENCY_WORDS
+    content_b = words_b - STOPWORDS - RECENCY_WORDS
+    if content_a and content_b:
+        words_a, words_b = content_a, content_b
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def _content_words(topic: str) -> list:
+    words = re.findall(r"[\w'&.+-]+", topic)
+    return [w for w in words if w.lower().strip(".'") not in STOPWORDS]
+
+
+def rewrite_query_locally(topic: str) -> str:
+    """
+    Rule-based query rewrite: strip filler words, fix entity casing and add news/recency hints.
+    
+    Args:
+        topic (str): The raw user topic
+        
+    Returns:
+        str: A search query such as "Tesla latest news"
+    """
+    words = _content_words(topic)
+    if not words:
+        return topic.strip()
+
+    cased = []
+    for word in words:
+        # Keep user-provided casing (e.g. "iPhone", "NASA"); capitalize plain lowercase words
+        if word.islower() and word.isalpha() and word not in RECENCY_WORDS:
+            word = word.capitalize()
+        cased.append(word)
+
+    lowered = {w.lower() for w in re.findall(r"\w+", topic)}
+    query = " ".join(cased)
+    if not lowered & RECENCY_WORDS:
+        query += " latest"
+    query += " news"
+    return query
+
+
+def _reserve_llm_call() -> bool:
+    """
+    Take one slot from the per-minute LLM budget; False when the budget is exhausted.
+    """
+    now = time.monotonic()
+    with _llm_calls_lock:
+        while _llm_calls and now - _llm_calls[0] > 60:
+            _llm_calls.pop(0)
+        if len(_llm_calls) >= LLM_QUERIES_PER_MINUTE:
+            return False
+        _llm_calls.append(now)
+        return True
+
+
 def generate_search_query(topic: str) -> str:
+    """
+    Produce a search query for a topic, using the cache, the local rewriter or the LLM.
+    
+    Args:
+        topic (str): The news topic
+        
+    Returns:
+        str: The search query (falls back to the local rewrite on error)
+    """
+    cached = get_cached_query(topic)
+    if cached:
+        return cached
+
+    key = normalize_topic(topic)
+
+    if len([w for w in _content_words(topic) if w.lower() not in RECENCY_WORDS]) <= SHORT_TOPIC_WORDS:
+        query = rewrite_query_locally(topic)
+        _query_cache.set(key, query)
+        return query
+
+    if not _reserve_llm_call():
+        print("⚠️  Query LLM budget exhausted, using local rewriter")
+        return rewrite_query_locally(topic)
+
     try:
         prompt = query_prompt.format(topic=topic)
 
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        query = complete("query", prompt, validate=valid_query).strip('"')
+        if not query:
+            query = rewrite_query_locally(topic)
 
-        # ✅ Correct extraction of LLM output
-        return response.choices[0].message.content.strip()
+        _query_cache.set(key, query)
+        return query
 
     except Exception as e:
         print("❌ Error in generate_search_query:", e)
-        return topic
+        return rewrite_query_locally(topic)
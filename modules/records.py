@@ -0,0 +1,77 @@
+"""
+Pipeline Records
+Compact typed records passed between the pipeline modules, the report store and the API.
+Slotted dataclasses keep per-article and per-result overhead small when many
+requests are in flight.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from utils.overload import MODE_FULL
+
+
+@dataclass(slots=True)
+class ArticleRecord:
+    """One summarized article (the full text is not kept)."""
+
+    url: str
+    title: str
+    summary: str
+    extractive: bool = False
+
+    def to_dict(self) -> Dict:
+        return {"url": self.url, "title": self.title, "summary": self.summary, "extractive": self.extractive}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ArticleRecord":
+        return cls(data["url"], data.get("title") or "", data.get("summary") or "", bool(data.get("extractive")))
+
+
+@dataclass(slots=True)
+class PipelineResult:
+    """Structured result of one pipeline run (or a stored report)."""
+
+    topic: str
+    report: str
+    success: bool = False
+    query: Optional[str] = None
+    executive_summary: Optional[str] = None
+    articles: List[ArticleRecord] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    generated_at: Optional[datetime] = None
+    mode: str = MODE_FULL
+    trace_id: Optional[str] = None
+    report_id: Optional[str] = None
+    budget: Optional[Dict] = None
+
+    def stats(self) -> Dict:
+        """
+        Article counts and success rate, as returned by the API.
+        """
+        processed = len(self.articles)
+        failed = len(self.failed)
+        total = processed + failed
+        return {
+            "total": total,
+            "processed": processed,
+            "failed": failed,
+            "success_rate": round(processed / total * 100, 1) if total else 0
+        }
+
+    def to_dict(self) -> Dict:
+        return {
+            "success": self.success,
+            "topic": self.topic,
+            "query": self.query,
+            "report": self.report,
+            "executive_summary": self.executive_summary,
+            "articles": [article.to_dict() for article in self.articles],
+            "failed": list(self.failed),
+            "generated_at": self.generated_at.isoformat() if self.generated_at else None,
+            "mode": self.mode,
+            "trace_id": self.trace_id,
+            "report_id": self.report_id,
+            "budget": self.budget,
+        }
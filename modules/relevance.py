@@ -0,0 +1,146 @@
+"""
+Semantic Relevance Filter
+Scores search results against the topic before any article is fetched.
+Uses a small local sentence-embedding model when sentence-transformers is installed,
+otherwise a hashed TF-IDF vectorizer; similarity is vectorized NumPy cosine.
+"""
+
+import os
+import re
+import threading
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+RELEVANCE_MODEL = os.getenv("RELEVANCE_MODEL", "all-MiniLM-L6-v2")
+# Results scoring below this cosine similarity are treated as off-topic
+RELEVANCE_MIN_SCORE = float(os.getenv("RELEVANCE_MIN_SCORE", "0.05"))
+HASH_FEATURES = 2 ** 14
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "on", "in", "to", "for", "about", "with", "at", "by",
+    "from", "is", "are", "was", "were", "be", "as", "it", "its", "this", "that", "news", "latest",
+}
+
+_model = None
+_model_loaded = False
+_model_lock = threading.Lock()
+
+
+def _get_model():
+    """
+    Load the sentence-embedding model once; None when it is unavailable.
+    """
+    global _model, _model_loaded
+    with _model_lock:
+        if not _model_loaded:
+            _model_loaded = True
+            if RELEVANCE_MODEL:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    _model = SentenceTransformer(RELEVANCE_MODEL, device="cpu")
+                except Exception:
+                    _model = None
+        return _model
+
+
+def _tokens(text: str) -> List[str]:
+    words = [w for w in _TOKEN_RE.findall(text.lower()) if w not in _STOPWORDS]
+    # Light stemming so "elections" matches "election"
+    words = [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in words]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def hashed_tfidf_vectors(texts: List[str], n_features: int = HASH_FEATURES) -> np.ndarray:
+    """
+    Embed texts as L2-normalized hashed TF-IDF vectors (IDF computed over the batch).
+
+    Args:
+        texts (List[str]): Documents to embed
+        n_features (int): Hash space size
+
+    Returns:
+        np.ndarray: Matrix of shape (len(texts), n_features)
+    """
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in _tokens(text):
+            matrix[row, zlib.crc32(token.encode("utf-8")) % n_features] += 1.0
+
+    # Sublinear term frequency and smoothed IDF
+    np.log1p(matrix, out=matrix)
+    df = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(texts)) / (1 + df)).astype(np.float32) + 1.0
+    matrix *= idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed texts with the local model, falling back to hashed TF-IDF.
+    """
+    model = _get_model()
+    if model is not None:
+        try:
+            return np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+        except Exception as e:
+            print(f"⚠️  Embedding model failed, using hashed TF-IDF: {str(e)}")
+    return hashed_tfidf_vectors(texts)
+
+
+def _result_text(result: Dict) -> str:
+    snippet = result.get("content") or result.get("snippet") or ""
+    return f"{result.get('title') or ''}. {snippet}"
+
+
+def score_results(topic: str, results: List[Dict]) -> np.ndarray:
+    """
+    Cosine similarity between the topic and each result's title/snippet.
+
+    Args:
+        topic (str): The news topic
+        results (List[Dict]): Search results
+
+    Returns:
+        np.ndarray: One score per result
+    """
+    if not results:
+        return np.zeros(0, dtype=np.float32)
+    vectors = embed_texts([topic] + [_result_text(r) for r in results])
+    return vectors[1:] @ vectors[0]
+
+
+def rank_by_relevance(topic: str, results: List[Dict], min_score: Optional[float] = None) -> List[Dict]:
+    """
+    Drop off-topic results and order the rest by semantic relevance.
+
+    If every result falls below the threshold, the full list is returned ranked,
+    so the pipeline never loses all candidates to the filter.
+
+    Args:
+        topic (str): The news topic
+        results (List[Dict]): Search results
+        min_score (Optional[float]): Minimum similarity (defaults to RELEVANCE_MIN_SCORE)
+
+    Returns:
+        List of results, most relevant first
+    """
+    if not results:
+        return []
+    threshold = RELEVANCE_MIN_SCORE if min_score is None else min_score
+
+    scores = score_results(topic, results)
+    order = np.argsort(-scores, kind="stable")
+    ranked = [results[i] for i in order if scores[i] >= threshold]
+    if not ranked:
+        return [results[i] for i in order]
+
+    dropped = len(results) - len(ranked)
+    if dropped:
+        print(f"🧹 Relevance filter dropped {dropped} off-topic results")
+    return ranked
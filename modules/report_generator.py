@@ -4,15 +4,19 @@ Combines summaries into a well-formatted report.
 Handles failures gracefully and produces readable, structured output.
 """
 
+import io
+import os
+import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
-from groq import Groq
+from functools import lru_cache
+from string import Template
+from typing import Dict, Iterator, List, Optional, TextIO
 from langchain_core.prompts import PromptTemplate
-from utils.api_keys import get_groq_key
+from utils.llm import complete, valid_executive_summary
+from utils.config import get_settings
+from modules.records import ArticleRecord, PipelineResult
 import html as html_escape
 
-client = Groq(api_key=get_groq_key())
-
 # ✅ LLM prompt for generating a cohesive report
 report_prompt = PromptTemplate(
     input_variables=["topic", "summaries"],
@@ -50,15 +54,15 @@ def generate_report_section(topic: str, summaries: List[str]) -> Optional[str]:
         )
         
         prompt = report_prompt.format(topic=topic, summaries=formatted_summaries)
+        settings = get_settings()
         
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=500
+        report = complete(
+            "executive",
+            prompt,
+            validate=valid_executive_summary,
+            temperature=settings.temperature,
+            max_tokens=settings.executive_max_tokens
         )
-        
-        report = response.choices[0].message.content.strip()
         return report
     
     except Exception as e:
@@ -66,158 +70,237 @@ def generate_report_section(topic: str, summaries: List[str]) -> Optional[str]:
         return None
 
 
-def format_full_report(
+REPORT_WIDTH = 80
+
+
+def wrap_text(text: str, width: int = REPORT_WIDTH) -> Iterator[str]:
+    """
+    Yield the non-blank lines of `text`, word-wrapped to `width` characters.
+    
+    Args:
+        text (str): Text that may contain several paragraphs
+        width (int): Maximum line width
+        
+    Yields:
+        str: One wrapped line at a time
+    """
+    for line in text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= width:
+            yield line
+            continue
+        
+        # Greedy wrapping; each word is counted with its trailing space
+        words = []
+        used = 0
+        for word in line.split():
+            if used + len(word) + 1 <= width:
+                words.append(word)
+                used += len(word) + 1
+            else:
+                if words:
+                    yield " ".join(words)
+                words = [word]
+                used = len(word) + 1
+        if words:
+            yield " ".join(words)
+
+
+def iter_full_report(
     topic: str,
-    processed_articles: List[Dict],
+    processed_articles: List[ArticleRecord],
     failed_urls: List[str],
-    executive_summary: Optional[str]
-) -> str:
+    executive_summary: Optional[str],
+    generated_at: Optional[datetime] = None
+) -> Iterator[str]:
     """
-    Format all components into a professional corporate report.
+    Render the report as a stream of newline-terminated chunks.
+    
+    Suitable for writing to a file or returning as a streaming HTTP response.
     
     Args:
         topic (str): The news topic
-        processed_articles (List[Dict]): Processed articles with summaries
+        processed_articles (List[ArticleRecord]): Processed articles with summaries
         failed_urls (List[str]): URLs that failed to process
         executive_summary (Optional[str]): The executive summary from LLM
+        generated_at (Optional[datetime]): Report timestamp (defaults to now)
         
-    Returns:
-        str: Formatted final report
+    Yields:
+        str: Report lines, each ending with a newline
     """
-    report = []
+    now = generated_at or datetime.now()
+    rule = "=" * REPORT_WIDTH + "\n"
+    divider = "-" * REPORT_WIDTH + "\n"
     
     # Professional Corporate Header
-    report.append("")
-    report.append("NEWS SUMMARY REPORT")
-    report.append(f"Topic: {topic}")
-    report.append("=" * 80)
-    report.append("")
-    report.append(f"Report Date: {datetime.now().strftime('%B %d, %Y')}")
-    report.append(f"Report Time: {datetime.now().strftime('%I:%M %p')}")
-    report.append("")
+    yield "\n"
+    yield "NEWS SUMMARY REPORT\n"
+    yield f"Topic: {topic}\n"
+    yield rule
+    yield "\n"
+    yield f"Report Date: {now.strftime('%B %d, %Y')}\n"
+    yield f"Report Time: {now.strftime('%I:%M %p')}\n"
+    yield "\n"
     
     # Executive Summary
     if executive_summary:
-        report.append("EXECUTIVE SUMMARY")
-        report.append("-" * 80)
-        report.append("")
-        
-        # Wrap executive summary text professionally
-        summary_lines = executive_summary.split('\n')
-        for line in summary_lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Professional word wrapping
-            if len(line) > 80:
-                words = line.split()
-                current_line = ""
-                for word in words:
-                    if len(current_line) + len(word) + 1 <= 80:
-                        current_line += word + " "
-                    else:
-                        if current_line:
-                            report.append(current_line.rstrip())
-                        current_line = word + " "
-                if current_line:
-                    report.append(current_line.rstrip())
-            else:
-                report.append(line)
-        
-        report.append("")
-        report.append("")
+        yield "EXECUTIVE SUMMARY\n"
+        yield divider
+        yield "\n"
+        for line in wrap_text(executive_summary):
+            yield line + "\n"
+        yield "\n"
+        yield "\n"
     
     # Articles Section - Professional Format
     if processed_articles:
-        report.append("ARTICLE SUMMARIES")
-        report.append("-" * 80)
-        report.append("")
+        yield "ARTICLE SUMMARIES\n"
+        yield divider
+        yield "\n"
         
         for idx, article in enumerate(processed_articles, 1):
-            report.append(f"{idx}. {article['title']}")
-            report.append("")
-            
-            # Summary with professional formatting
-            summary_text = article['summary'].strip()
-            summary_lines = summary_text.split('\n')
-            for line in summary_lines:
-                line = line.strip()
-                if not line:
-                    continue
-                if len(line) > 80:
-                    words = line.split()
-                    current_line = ""
-                    for word in words:
-                        if len(current_line) + len(word) + 1 <= 80:
-                            current_line += word + " "
-                        else:
-                            if current_line:
-                                report.append(current_line.rstrip())
-                            current_line = word + " "
-                    if current_line:
-                        report.append(current_line.rstrip())
-                else:
-                    report.append(line)
-            
-            report.append("")
-            report.append(f"Source: {article['url']}")
-            report.append("")
-            report.append("-" * 80)
-            report.append("")
+            yield f"{idx}. {article.title}\n"
+            yield "\n"
+            if article.extractive:
+                yield "[Extractive summary - key sentences selected automatically]\n"
+            for line in wrap_text(article.summary):
+                yield line + "\n"
+            yield "\n"
+            yield f"Source: {article.url}\n"
+            yield "\n"
+            yield divider
+            yield "\n"
     
     # Professional Footer
-    report.append("END OF REPORT")
-    report.append("=" * 80)
-    report.append("")
+    yield "END OF REPORT\n"
+    yield rule
+
+
+def write_full_report(
+    out: TextIO,
+    topic: str,
+    processed_articles: List[ArticleRecord],
+    failed_urls: List[str],
+    executive_summary: Optional[str],
+    generated_at: Optional[datetime] = None
+) -> None:
+    """
+    Write the formatted report directly to a text stream (file, socket wrapper, StringIO).
     
-    return "\n".join(report)
+    Args:
+        out (TextIO): Any object with a `write(str)` method
+        (remaining args as in `iter_full_report`)
+    """
+    for chunk in iter_full_report(topic, processed_articles, failed_urls, executive_summary, generated_at):
+        out.write(chunk)
 
 
-def generate_final_report(
+def format_full_report(
     topic: str,
-    processed_articles: List[Dict],
-    failed_urls: List[str]
+    processed_articles: List[ArticleRecord],
+    failed_urls: List[str],
+    executive_summary: Optional[str],
+    generated_at: Optional[datetime] = None
 ) -> str:
     """
-    Main function to generate the complete final report.
+    Format all components into a professional corporate report.
     
     Args:
         topic (str): The news topic
-        processed_articles (List[Dict]): List of processed articles
+        processed_articles (List[ArticleRecord]): Processed articles with summaries
+        failed_urls (List[str]): URLs that failed to process
+        executive_summary (Optional[str]): The executive summary from LLM
+        generated_at (Optional[datetime]): Report timestamp (defaults to now)
+        
+    Returns:
+        str: Formatted final report
+    """
+    buffer = io.StringIO()
+    write_full_report(buffer, topic, processed_articles, failed_urls, executive_summary, generated_at)
+    return buffer.getvalue()
+
+
+def build_report(
+    topic: str,
+    processed_articles: List[ArticleRecord],
+    failed_urls: List[str],
+    include_executive_summary: bool = True
+) -> PipelineResult:
+    """
+    Generate the executive summary and plain-text report, keeping the structured parts.
+    
+    Args:
+        topic (str): The news topic
+        processed_articles (List[ArticleRecord]): List of processed articles
         failed_urls (List[str]): List of failed URLs
+        include_executive_summary (bool): Set False to skip the LLM executive summary
         
     Returns:
-        str: The complete formatted report
+        PipelineResult with 'topic', 'generated_at', 'executive_summary', 'articles',
+        'failed' and 'report' (the formatted plain-text report)
     """
+    generated_at = datetime.now()
+    executive_summary = None
     try:
         # Step 1: Extract summaries from processed articles
-        summaries = [article["summary"] for article in processed_articles]
+        summaries = [article.summary for article in processed_articles]
         
         # Step 2: Generate executive summary (optional if we have articles)
-        executive_summary = None
-        if summaries:
+        if summaries and include_executive_summary:
             executive_summary = generate_report_section(topic, summaries)
         
-        # Step 3: Format and return the complete report
-        final_report = format_full_report(
+        # Step 3: Format the complete report
+        report = format_full_report(
             topic,
             processed_articles,
             failed_urls,
-            executive_summary
+            executive_summary,
+            generated_at
         )
-        
-        return final_report
     
     except Exception as e:
         print(f"❌ Error generating final report: {str(e)}")
         # Fallback report on error
-        return f"⚠️  Error generating report for topic '{topic}': {str(e)}"
+        report = f"⚠️  Error generating report for topic '{topic}': {str(e)}"
+    
+    return PipelineResult(
+        topic=topic,
+        report=report,
+        executive_summary=executive_summary,
+        articles=processed_articles,
+        failed=failed_urls,
+        generated_at=generated_at,
+    )
+
+
+def generate_final_report(
+    topic: str,
+    processed_articles: List[ArticleRecord],
+    failed_urls: List[str]
+) -> str:
+    """
+    Main function to generate the complete final report.
+    
+    Args:
+        topic (str): The news topic
+        processed_articles (List[ArticleRecord]): List of processed articles
+        failed_urls (List[str]): List of failed URLs
+        
+    Returns:
+        str: The complete formatted report
+    """
+    return build_report(topic, processed_articles, failed_urls).report
 
 
 def save_report_to_file(report: str, filename: Optional[str] = None) -> Optional[str]:
     """
     Save the report to a file.
     
+    The file is written to a temporary name and renamed into place, so readers
+    never see a partial report.
+    
     Args:
         report (str): The report content
         filename (Optional[str]): Custom filename, or auto-generated if None
@@ -227,11 +310,14 @@ def save_report_to_file(report: str, filename: Optional[str] = None) -> Optional
     """
     try:
         if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"news_report_{timestamp}.txt"
+            # Microseconds plus a short random suffix keep concurrent saves from colliding
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            filename = f"news_report_{timestamp}_{uuid.uuid4().hex[:6]}.txt"
         
-        with open(filename, "w", encoding="utf-8") as f:
+        tmp_filename = f"{filename}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
             f.write(report)
+        os.replace(tmp_filename, filename)
         
         print(f"✅ Report saved to: {filename}")
         return filename
@@ -241,9 +327,127 @@ def save_report_to_file(report: str, filename: Optional[str] = None) -> Optional
         return None
 
 
+# Map style keys to CSS font-family and accent color
+FONT_MAP = {
+    'standard': ("'Segoe UI', Tahoma, Geneva, Verdana, sans-serif", '#2a3550'),
+    'serif': ("Georgia, 'Times New Roman', Times, serif", '#2a3550'),
+    'mono': ("'Courier New', Courier, monospace", '#2a3550'),
+    'corporate': ("'Segoe UI', Tahoma, Geneva, Verdana, sans-serif", '#2a3550')
+}
+
+_HTML_OPEN = """
+    <div style="font-family: {font_family}; color:#111; line-height:1.6; padding:8px;">
+      <div style="max-width:100%; padding:20px; background: #fbfdff; border-radius:10px; border:1px solid #eef3fb; box-shadow: 0 6px 18px rgba(50,70,120,0.04);">
+        """
+
+_HTML_CLOSE = """
+      </div>
+    </div>
+    """
+
+
+def _html_templates(style: str) -> Dict[str, Template]:
+    """
+    Compiled HTML fragments for a style; unknown styles use 'corporate'.
+    """
+    # Normalize before the cached call so arbitrary client-supplied styles add no cache entries
+    return _compile_html_templates(style if style in FONT_MAP else 'corporate')
+
+
+@lru_cache(maxsize=None)
+def _compile_html_templates(style: str) -> Dict[str, Template]:
+    """
+    Compile the HTML fragments for a style once; reused across requests.
+    """
+    font_family, accent = FONT_MAP[style]
+    h2 = f'<h2 style="color:{accent}; margin-top:18px;">$text</h2>\n'
+    return {
+        'open': Template(_HTML_OPEN.format(font_family=font_family)),
+        'close': Template(_HTML_CLOSE),
+        'h2': Template(h2),
+        'h3': Template(f'<h3 style="color:{accent}; margin-top:14px;">$index. $title</h3>\n'),
+        'p': Template('<p style="margin:8px 0;">$text</p>\n'),
+        'meta': Template('<p style="margin:4px 0; color:#555;">$text</p>\n'),
+        'source': Template(
+            '<p style="margin:8px 0; font-size:0.9em;">Source: '
+            '<a href="$url" target="_blank" rel="noopener noreferrer" style="color:' + accent + ';">$url</a></p>\n'
+        ),
+    }
+
+
+def _html_paragraphs(text: str, template: Template) -> Iterator[str]:
+    """
+    Yield one escaped paragraph per block of non-blank lines.
+    """
+    para_lines = []
+    for line in text.split('\n'):
+        line = line.strip()
+        if line:
+            para_lines.append(line)
+        elif para_lines:
+            yield template.substitute(text=html_escape.escape(' '.join(para_lines)))
+            para_lines = []
+    if para_lines:
+        yield template.substitute(text=html_escape.escape(' '.join(para_lines)))
+
+
+def iter_html_report(report_data: PipelineResult, style: str = 'corporate') -> Iterator[str]:
+    """
+    Render the HTML report in one pass over the structured report data.
+    
+    Args:
+        report_data (PipelineResult): Result of `build_report` or a stored report
+        style (str): One of the `FONT_MAP` keys
+        
+    Yields:
+        str: HTML fragments, suitable for a streaming response
+    """
+    t = _html_templates(style)
+    now = report_data.generated_at or datetime.now()
+    
+    yield t['open'].substitute()
+    yield t['h2'].substitute(text='News Summary Report')
+    yield t['meta'].substitute(text='Topic: ' + html_escape.escape(report_data.topic or ''))
+    yield t['meta'].substitute(text=f"Report Date: {now.strftime('%B %d, %Y')} &middot; {now.strftime('%I:%M %p')}")
+    
+    executive_summary = report_data.executive_summary
+    if executive_summary:
+        yield t['h2'].substitute(text='Executive Summary')
+        yield from _html_paragraphs(executive_summary, t['p'])
+    
+    articles = report_data.articles
+    if articles:
+        yield t['h2'].substitute(text='Article Summaries')
+        for idx, article in enumerate(articles, 1):
+            yield t['h3'].substitute(index=idx, title=html_escape.escape(article.title))
+            if article.extractive:
+                yield t['meta'].substitute(text='<em>Extractive summary - key sentences selected automatically</em>')
+            yield from _html_paragraphs(article.summary, t['p'])
+            url = article.url if article.url.lower().startswith(('http://', 'https://')) else '#'
+            yield t['source'].substitute(url=html_escape.escape(url, quote=True))
+    
+    yield t['close'].substitute()
+
+
+def render_html_report(report_data: PipelineResult, style: str = 'corporate') -> str:
+    """
+    Render the HTML report from structured data as a single string.
+    
+    Args:
+        report_data (PipelineResult): Result of `build_report`
+        style (str): One of the `FONT_MAP` keys
+        
+    Returns:
+        str: HTML string (safe, escaped) ready to be embedded in the UI.
+    """
+    return ''.join(iter_html_report(report_data, style))
+
+
 def generate_html_report(report_text: str, style: str = 'corporate') -> str:
     """
     Generate a safe HTML version of a plain-text report using the selected style.
+    Prefer `render_html_report` when the structured report data is available;
+    this text-based variant is kept for reports that only exist as plain text.
 
     Args:
         report_text (str): The plain-text report produced by `generate_final_report`.
@@ -252,15 +456,7 @@ def generate_html_report(report_text: str, style: str = 'corporate') -> str:
     Returns:
         str: HTML string (safe, escaped) ready to be embedded in the UI.
     """
-    # Map style keys to CSS font-family and accent color
-    font_map = {
-        'standard': ("'Segoe UI', Tahoma, Geneva, Verdana, sans-serif", '#2a3550'),
-        'serif': ("Georgia, 'Times New Roman', Times, serif", '#2a3550'),
-        'mono': ("'Courier New', Courier, monospace", '#2a3550'),
-        'corporate': ("'Segoe UI', Tahoma, Geneva, Verdana, sans-serif", '#2a3550')
-    }
-
-    font_family, accent = font_map.get(style, font_map['corporate'])
+    font_family, accent = FONT_MAP.get(style, FONT_MAP['corporate'])
 
     # Sanitize the report content to avoid XSS
     safe_text = html_escape.escape(report_text)
@@ -0,0 +1,287 @@
+"""
+Report Storage
+Keeps generated reports in a SQLite database instead of loose timestamped files.
+Supports lookup by id/topic/date, full-text search (FTS5 when available) and retention.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from modules.records import ArticleRecord, PipelineResult
+
+REPORT_DB_PATH = os.getenv("REPORT_DB_PATH", "reports.db")
+# Reports older than this many days are deleted (0 disables age-based retention)
+REPORT_RETENTION_DAYS = int(os.getenv("REPORT_RETENTION_DAYS", "30"))
+# At most this many reports are kept, oldest first out (0 disables count-based retention)
+REPORT_MAX_COUNT = int(os.getenv("REPORT_MAX_COUNT", "1000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id TEXT PRIMARY KEY,
+    topic TEXT NOT NULL,
+    topic_norm TEXT NOT NULL,
+    query TEXT,
+    created_at TEXT NOT NULL,
+    report TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reports_created_at ON reports(created_at);
+CREATE INDEX IF NOT EXISTS idx_reports_topic_norm ON reports(topic_norm, created_at);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+    topic, report, content='reports', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+    INSERT INTO reports_fts(rowid, topic, report) VALUES (new.rowid, new.topic, new.report);
+END;
+CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+    INSERT INTO reports_fts(reports_fts, rowid, topic, report) VALUES ('delete', old.rowid, old.topic, old.report);
+END;
+"""
+
+_SUMMARY_COLUMNS = "id, topic, query, created_at"
+
+
+def _normalize_topic(topic: str) -> str:
+    return " ".join(topic.lower().split())
+
+
+def _fts_query(text: str) -> str:
+    """
+    Quote each search term so user input cannot inject FTS5 syntax.
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+class ReportStore:
+    """
+    SQLite-backed report store.
+
+    Each call opens its own short-lived connection, so the store is safe to share
+    between Flask worker threads. Writes happen in a single transaction.
+
+    Args:
+        path (str): Database file path
+        retention_days (int): Delete reports older than this (0 = keep forever)
+        max_reports (int): Keep at most this many reports (0 = unlimited)
+    """
+
+    def __init__(self, path: str = REPORT_DB_PATH, retention_days: int = REPORT_RETENTION_DAYS,
+                 max_reports: int = REPORT_MAX_COUNT):
+        self.path = path
+        self.retention_days = retention_days
+        self.max_reports = max_reports
+        self.fts_enabled = False
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            try:
+                conn.executescript(_FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5: fall back to LIKE-based search
+                print("⚠️  SQLite FTS5 unavailable, report search will use LIKE")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def save(self, result: PipelineResult) -> str:
+        """
+        Store a pipeline result atomically.
+
+        Args:
+            result (PipelineResult): Result of `run_news_summarizer_pipeline`
+
+        Returns:
+            str: The new report id
+        """
+        report_id = uuid.uuid4().hex
+        created_at = result.generated_at or datetime.now()
+        data = {
+            "executive_summary": result.executive_summary,
+            "articles": [article.to_dict() for article in result.articles],
+            "failed": result.failed,
+        }
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO reports (id, topic, topic_norm, query, created_at, report, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        report_id,
+                        result.topic,
+                        _normalize_topic(result.topic),
+                        result.query,
+                        created_at.isoformat(),
+                        result.report,
+                        json.dumps(data),
+                    ),
+                )
+                self._apply_retention(conn)
+        finally:
+            conn.close()
+        return report_id
+
+    def get(self, report_id: str) -> Optional[PipelineResult]:
+        """
+        Fetch a full report (text plus structured data) by id, or None.
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        data = json.loads(row["data"])
+        return PipelineResult(
+            topic=row["topic"],
+            report=row["report"],
+            success=True,
+            query=row["query"],
+            executive_summary=data.get("executive_summary"),
+            articles=[ArticleRecord.from_dict(article) for article in data.get("articles", [])],
+            failed=data.get("failed", []),
+            generated_at=datetime.fromisoformat(row["created_at"]),
+            report_id=row["id"],
+        )
+
+    def latest_for_topic(self, topic: str, max_age_seconds: Optional[float] = None) -> Optional[PipelineResult]:
+        """
+        Return the most recent report for a topic, optionally no older than `max_age_seconds`.
+        """
+        rows = self.list(topic=topic, limit=1)
+        if not rows:
+            return None
+        if max_age_seconds is not None:
+            created_at = datetime.fromisoformat(rows[0]["created_at"])
+            if (datetime.now() - created_at).total_seconds() > max_age_seconds:
+                return None
+        return self.get(rows[0]["id"])
+
+    def list(self, topic: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+             limit: int = 20, offset: int = 0) -> List[Dict]:
+        """
+        List report summaries, newest first.
+
+        Args:
+            topic (str): Exact topic match (case/whitespace-insensitive)
+            since (str): ISO date/datetime lower bound (inclusive)
+            until (str): ISO date/datetime upper bound (exclusive)
+            limit (int): Page size
+            offset (int): Page offset
+
+        Returns:
+            List of dicts with 'id', 'topic', 'query', 'created_at'
+        """
+        clauses, params = [], []
+        if topic:
+            clauses.append("topic_norm = ?")
+            params.append(_normalize_topic(topic))
+        if since:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("created_at < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {_SUMMARY_COLUMNS} FROM reports {where} ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params + [limit, offset]).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def search(self, text: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """
+        Full-text search over report topics and contents, best matches first.
+
+        Returns:
+            List of dicts with 'id', 'topic', 'query', 'created_at' and 'snippet'
+        """
+        if not text.strip():
+            return []
+        conn = self._connect()
+        try:
+            if self.fts_enabled:
+                rows = conn.execute(
+                    "SELECT r.id, r.topic, r.query, r.created_at, "
+                    "snippet(reports_fts, 1, '[', ']', '...', 12) AS snippet "
+                    "FROM reports_fts JOIN reports r ON r.rowid = reports_fts.rowid "
+                    "WHERE reports_fts MATCH ? ORDER BY rank LIMIT ? OFFSET ?",
+                    (_fts_query(text), limit, offset),
+                ).fetchall()
+            else:
+                pattern = f"%{text}%"
+                rows = conn.execute(
+                    f"SELECT {_SUMMARY_COLUMNS}, substr(report, 1, 120) AS snippet FROM reports "
+                    "WHERE topic LIKE ? OR report LIKE ? ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                    (pattern, pattern, limit, offset),
+                ).fetchall()
+        finally:
+            conn.close()
+        return [dict(row) for row in rows]
+
+    def delete(self, report_id: str) -> bool:
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute("DELETE FROM reports WHERE id = ?", (report_id,))
+        finally:
+            conn.close()
+        return cursor.rowcount > 0
+
+    def _apply_retention(self, conn: sqlite3.Connection):
+        if self.retention_days > 0:
+            cutoff = (datetime.now() - timedelta(days=self.retention_days)).isoformat()
+            conn.execute("DELETE FROM reports WHERE created_at < ?", (cutoff,))
+        if self.max_reports > 0:
+            conn.execute(
+                "DELETE FROM reports WHERE id IN ("
+                "SELECT id FROM reports ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_reports,),
+            )
+
+    def apply_retention(self):
+        """
+        Enforce the age and count retention limits.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                self._apply_retention(conn)
+        finally:
+            conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_report_store() -> ReportStore:
+    """
+    Return the shared report store, creating the database on first use.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore()
+        return _store
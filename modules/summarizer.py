@@ -2,15 +2,33 @@
 Module 3: Article Extraction & Summarization
 Fetches article content from URLs and generates clean, concise summaries using LLM.
 Handles network errors, parsing failures, and missing content gracefully.
+
+Articles longer than settings.article_max_chars are summarized map-reduce style:
+token-budgeted chunks are summarized concurrently (each chunk summary is cached),
+then combined by one reduce call.
 """
 
 from newspaper import Article
-from groq import Groq
 from langchain_core.prompts import PromptTemplate
-from utils.api_keys import get_groq_key
-from typing import Optional, Dict, Tuple
-
-client = Groq(api_key=get_groq_key())
+from utils.llm import complete, valid_summary, LONG_ARTICLE_CHARS
+from modules.domain_health import get_domain_registry, classify_fetch_error
+from modules.extractive import extractive_summary
+from modules.fetcher import stream_download, FetchRejected
+from modules.records import ArticleRecord
+from modules.article_budget import ArticleBudget
+from utils.overload import guarded, BackendOverloaded
+from utils.tracing import span, submit_with_context
+from utils.config import get_settings, use_settings
+from utils.cache import TTLCache
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+from typing import Optional, Dict, List, Tuple
+import hashlib
+import math
+import os
+import re
+import time
 
 # ✅ LLM prompt for summarization
 summarize_prompt = PromptTemplate(
@@ -27,28 +45,91 @@ Summary:
 """
 )
 
+chunk_prompt = PromptTemplate(
+    input_variables=["index", "total", "chunk_content"],
+    template="""
+You are a news summarization expert.
+Summarize part {index} of {total} of a news article in 2-3 sentences.
+Keep the key facts, names and numbers. Do not add information.
+
+Article part:
+{chunk_content}
 
-def fetch_article_content(url: str) -> Optional[Tuple[str, str]]:
+Summary:
+"""
+)
+
+reduce_prompt = PromptTemplate(
+    input_variables=["chunk_summaries"],
+    template="""
+You are a news summarization expert.
+The following are summaries of consecutive parts of one news article.
+Combine them into a single summary of 3-4 sentences, capturing the key points.
+Keep it concise, informative, and neutral.
+
+Part summaries:
+{chunk_summaries}
+
+Summary:
+"""
+)
+
+# Chunk summaries are cached by chunk content, so re-fetched articles skip the map step
+CHUNK_CACHE_TTL = float(os.getenv("CHUNK_CACHE_TTL", "21600"))
+_chunk_cache = TTLCache(ttl=CHUNK_CACHE_TTL, maxsize=2048)
+# Threads summarizing the chunks of one article
+MAX_CHUNK_WORKERS = int(os.getenv("MAX_CHUNK_WORKERS", "4"))
+# Share of fetched articles expected to exceed article_max_chars (for latency estimates)
+LONG_ARTICLE_SHARE = float(os.getenv("LONG_ARTICLE_SHARE", "0.5"))
+_CHARS_PER_TOKEN = 4
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def fetch_article_content(url: str, deadline: Optional[float] = None) -> Optional[Tuple[str, str]]:
     """
     Fetch article content from a URL using newspaper3k.
     
+    The page is streamed with size and content-type limits (see `stream_download`)
+    and handed to newspaper3k for parsing; the text is capped at settings.fetch_text_chars.
+    
     Args:
         url (str): The URL of the article
+        deadline (float): Optional `time.monotonic()` by which the download must finish
         
     Returns:
         Tuple[str, str]: (title, text) if successful, None if failed
     """
+    registry = get_domain_registry()
+    settings = get_settings()
+    started = time.monotonic()
     try:
-        article = Article(url, request_timeout=10)
-        article.download()
-        article.parse()
+        article = Article(url, request_timeout=settings.request_timeout)
+        with span("article.fetch", url=url) as s:
+            with guarded("fetch"):
+                html, received = stream_download(
+                    url,
+                    timeout=settings.request_timeout,
+                    max_bytes=settings.fetch_max_bytes,
+                    text_target=settings.fetch_text_chars,
+                    user_agent=article.config.browser_user_agent,
+                    deadline=deadline
+                )
+            s.set(bytes=received)
+        with span("article.parse", url=url):
+            article.download(input_html=html)
+            article.parse()
+        del html
         
         # Validate that we got meaningful content
-        text = article.text.strip() if article.text else ""
+        text = article.text.strip()[:settings.fetch_text_chars] if article.text else ""
+        title = article.title
+        # Drop newspaper's copies of the page (raw HTML, DOM trees) right away
+        del article
         
         # Check for minimum content length (relaxed to 80 chars)
         if len(text) < 80:
             print(f"⚠️  Article at {url} has insufficient content (likely paywalled or blocked)")
+            registry.record_failure(url, "thin_content", time.monotonic() - started)
             return None
         
         # Filter out pages that are just copyright notices or navigation
@@ -59,54 +140,197 @@ def fetch_article_content(url: str) -> Optional[Tuple[str, str]]:
         # If almost entire page is spam keywords, reject it
         if spam_count >= 4:
             print(f"⚠️  Article at {url} appears to be navigation/legal text, not news content")
+            registry.record_failure(url, "spam", time.monotonic() - started)
             return None
         
         # Validate we have a proper title
-        if not article.title or len(article.title.strip()) < 5:
+        if not title or len(title.strip()) < 5:
             print(f"⚠️  Article at {url} has no valid title")
+            registry.record_failure(url, "no_title", time.monotonic() - started)
             return None
         
-        return (article.title, text)
+        registry.record_success(url, time.monotonic() - started)
+        return (title, text)
+    
+    except BackendOverloaded as e:
+        # Our own fetch limiter is saturated; not the domain's fault
+        print(f"⚠️  Skipping {url}: {str(e)}")
+        return None
+    
+    except FetchRejected as e:
+        print(f"⚠️  Skipping {url}: {str(e)}")
+        registry.record_failure(url, e.reason, time.monotonic() - started)
+        return None
     
     except Exception as e:
-        error_msg = str(e).lower()
-        if "404" in error_msg or "not found" in error_msg:
+        reason = classify_fetch_error(e)
+        registry.record_failure(url, reason, time.monotonic() - started)
+        if reason == "not_found":
             print(f"⚠️  Article not found (404): {url}")
-        elif "403" in error_msg or "forbidden" in error_msg:
+        elif reason == "forbidden":
             print(f"⚠️  Article blocked/forbidden (403): {url}")
-        elif "timeout" in error_msg:
+        elif reason == "timeout":
             print(f"⚠️  Connection timeout: {url}")
         else:
             print(f"❌ Error fetching article from {url}: {str(e)}")
         return None
 
 
+def split_into_chunks(text: str, max_tokens: int, max_chunks: int) -> List[str]:
+    """
+    Split text into chunks of at most `max_tokens` (estimated), on paragraph and
+    sentence boundaries where possible.
+    
+    Args:
+        text (str): Article text
+        max_tokens (int): Token budget per chunk
+        max_chunks (int): Text beyond this many chunks is dropped
+        
+    Returns:
+        List[str]: The chunks, in article order
+    """
+    budget = max_tokens * _CHARS_PER_TOKEN
+    pieces = []
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        if len(paragraph) <= budget:
+            pieces.append(paragraph)
+            continue
+        for sentence in _SENTENCE_END.split(paragraph):
+            # Hard-split the rare sentence that is longer than a whole chunk
+            pieces.extend(sentence[i:i + budget] for i in range(0, len(sentence), budget))
+    
+    chunks = []
+    current = []
+    used = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        if current and used + len(piece) + 1 > budget:
+            chunks.append("\n".join(current))
+            if len(chunks) == max_chunks:
+                return chunks
+            current, used = [], 0
+        current.append(piece)
+        used += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks[:max_chunks]
+
+
+def _summarize_chunk(chunk: str, index: int, total: int) -> Optional[str]:
+    settings = get_settings()
+    key = (hashlib.sha1(chunk.encode("utf-8")).hexdigest(), settings.chunk_summary_max_tokens, settings.temperature)
+    cached = _chunk_cache.get(key)
+    if cached is not None:
+        return cached
+    try:
+        summary = complete(
+            "summary_chunk",
+            chunk_prompt.format(index=index, total=total, chunk_content=chunk),
+            validate=valid_summary,
+            temperature=settings.temperature,
+            max_tokens=settings.chunk_summary_max_tokens
+        )
+    except Exception as e:
+        print(f"⚠️  Error summarizing article part {index}/{total}: {str(e)}")
+        return None
+    if summary:
+        _chunk_cache.set(key, summary)
+    return summary
+
+
+def expected_summary_rounds() -> float:
+    """
+    Expected sequential LLM rounds to summarize one article under the current settings.
+    
+    Short articles take one call; long ones take ceil(chunks / workers) map rounds plus
+    the reduce call. The two are weighted by LONG_ARTICLE_SHARE.
+    """
+    settings = get_settings()
+    if settings.fetch_text_chars <= settings.article_max_chars:
+        return 1.0
+    chunks = min(settings.max_chunks, math.ceil(settings.fetch_text_chars / (settings.chunk_tokens * _CHARS_PER_TOKEN)))
+    if chunks <= 1:
+        return 1.0
+    workers = max(1, min(chunks, MAX_CHUNK_WORKERS))
+    long_rounds = math.ceil(chunks / workers) + 1
+    return (1 - LONG_ARTICLE_SHARE) + LONG_ARTICLE_SHARE * long_rounds
+
+
+def summarize_long_article(article_text: str) -> Optional[str]:
+    """
+    Map-reduce summary for long articles: summarize chunks concurrently, then combine.
+    
+    Args:
+        article_text (str): The full text of the article
+        
+    Returns:
+        str: The combined summary, or None if no chunk could be summarized
+    """
+    settings = get_settings()
+    chunks = split_into_chunks(article_text, settings.chunk_tokens, settings.max_chunks)
+    if not chunks:
+        return None
+    with span("summary.map_reduce", chars=len(article_text), chunks=len(chunks)) as s:
+        # Map: chunk calls run in parallel (bounded by the Groq limiter), not one after another
+        workers = max(1, min(len(chunks), settings.max_chunks, MAX_CHUNK_WORKERS))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                submit_with_context(executor, _summarize_chunk, chunk, index, len(chunks))
+                for index, chunk in enumerate(chunks, 1)
+            ]
+            summaries = [summary for summary in (f.result() for f in futures) if summary]
+        s.set(chunk_summaries=len(summaries))
+        
+        if not summaries:
+            return None
+        if len(summaries) == 1:
+            return summaries[0]
+        
+        # Reduce: one call over the chunk summaries
+        try:
+            return complete(
+                "summary_long",
+                reduce_prompt.format(chunk_summaries="\n\n".join(summaries)),
+                validate=valid_summary,
+                temperature=settings.temperature,
+                max_tokens=settings.summary_max_tokens
+            )
+        except Exception as e:
+            print(f"❌ Error combining article part summaries: {str(e)}")
+            return None
+
+
 def summarize_article(article_text: str) -> Optional[str]:
     """
     Generate a summary of article content using Groq LLM.
     
+    Articles longer than settings.article_max_chars go through `summarize_long_article`.
+    
     Args:
         article_text (str): The full text of the article
         
     Returns:
         str: The summary, or None if summarization fails
     """
+    settings = get_settings()
     try:
-        # Truncate very long articles to avoid token limits
-        max_chars = 4000
-        if len(article_text) > max_chars:
-            article_text = article_text[:max_chars] + "..."
+        if len(article_text) > settings.article_max_chars:
+            return summarize_long_article(article_text)
+        
+        # Short articles go to the fast model, long ones to the large model
+        stage = "summary_long" if len(article_text) > LONG_ARTICLE_CHARS else "summary_short"
         
         prompt = summarize_prompt.format(article_content=article_text)
         
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=300
+        summary = complete(
+            stage,
+            prompt,
+            validate=valid_summary,
+            temperature=settings.temperature,
+            max_tokens=settings.summary_max_tokens
         )
-        
-        summary = response.choices[0].message.content.strip()
         return summary
     
     except Exception as e:
@@ -114,61 +338,142 @@ def summarize_article(article_text: str) -> Optional[str]:
         return None
 
 
-def process_article(url: str) -> Optional[Dict]:
+# Summary backends: "llm" (Groq), "extractive" (local, fast mode) or
+# "auto" (LLM first, extractive fallback when the LLM call fails)
+SUMMARY_BACKENDS = {
+    "llm": summarize_article,
+    "extractive": extractive_summary,
+}
+BACKEND_AUTO = "auto"
+
+
+def summarize_with_backend(article_text: str, backend: str = BACKEND_AUTO) -> Tuple[Optional[str], bool]:
+    """
+    Summarize text with the selected backend.
+    
+    Args:
+        article_text (str): The full text of the article
+        backend (str): "llm", "extractive" or "auto"
+        
+    Returns:
+        Tuple[Optional[str], bool]: (summary, whether the summary is extractive)
+    """
+    if backend == BACKEND_AUTO:
+        summary = summarize_article(article_text)
+        if summary:
+            return summary, False
+        print("↩️  Falling back to local extractive summary")
+        return extractive_summary(article_text), True
+    
+    summary = SUMMARY_BACKENDS[backend](article_text)
+    return summary, backend == "extractive"
+
+
+def process_article(url: str, backend: str = BACKEND_AUTO, deadline: Optional[float] = None) -> Optional[ArticleRecord]:
     """
     Complete pipeline: fetch article and generate summary.
     
     Args:
         url (str): The article URL
+        backend (str): Summary backend ("llm", "extractive" or "auto")
+        deadline (float): Optional `time.monotonic()` by which the download must finish
         
     Returns:
-        Dict with 'url', 'title', 'summary' if successful, None if failed
+        ArticleRecord if successful, None if failed
     """
+    # Skip domains whose circuit is open (consistently blocked/paywalled)
+    if get_domain_registry().is_blocked(url):
+        print(f"⏭️  Skipping {url}: domain is temporarily circuit-broken")
+        return None
+    
     # Step 1: Fetch article content
-    result = fetch_article_content(url)
+    result = fetch_article_content(url, deadline=deadline)
     if not result:
         return None
     
     title, text = result
     
-    # Step 2: Generate summary
-    summary = summarize_article(text)
+    # Step 2: Generate summary, then drop the full text right away
+    summary, extractive = summarize_with_backend(text, backend)
+    del text, result
     if not summary:
         return None
     
     # Step 3: Return structured data
-    return {
-        "url": url,
-        "title": title,
-        "summary": summary
-    }
+    return ArticleRecord(url, title, summary, extractive)
 
 
-def process_multiple_articles(urls: list) -> Dict:
+def process_multiple_articles(urls: list, backend: str = BACKEND_AUTO, budget: Optional[ArticleBudget] = None,
+                              backups: Optional[list] = None) -> Dict:
     """
     Process multiple article URLs and return results and failures.
     
     Args:
         urls (list): List of article URLs
+        backend (str): Summary backend ("llm", "extractive" or "auto")
+        budget (ArticleBudget): Optional latency-SLO controller; decides per article
+            whether to go on and sets its fetch timeout
+        backups (list): URLs tried after `urls` (budget mode only) in place of selected
+            URLs that failed or were skipped, never beyond `len(urls)` articles
         
     Returns:
-        Dict with 'processed' (successful articles) and 'failed' (failed URLs)
+        Dict with 'processed' (successful ArticleRecords), 'failed' (failed URLs)
+        and 'skipped' (URLs the budget decided not to attempt)
     """
     processed = []
     failed = []
+    skipped = []
+    settings = get_settings()
+    
+    # Fetch healthy domains first; circuit-broken domains count as failed
+    registry = get_domain_registry()
+    scheduled = registry.prioritize(urls)
+    primary = len(scheduled)
+    failed.extend(url for url in urls if url not in scheduled)
+    if budget is not None and backups:
+        scheduled += [url for url in registry.prioritize(backups) if url not in urls]
     
-    for url in urls:
+    for position, url in enumerate(scheduled):
+        if position >= primary and len(processed) >= len(urls):
+            # Backups only replace selected articles that failed or were skipped
+            break
+        overrides = nullcontext()
+        deadline = None
+        if budget is not None:
+            timeout = budget.admit(url, settings.request_timeout)
+            if timeout is None:
+                if budget.stop_reason:
+                    # Out of budget (or done): leave the rest of the selection unattempted
+                    skipped.extend(scheduled[position:])
+                    break
+                skipped.append(url)
+                continue
+            overrides = use_settings(replace(settings, request_timeout=timeout))
+        
         print(f"🔄 Processing: {url}")
-        result = process_article(url)
+        started = time.monotonic()
+        if budget is not None:
+            # The timeout also bounds the whole download, not just each socket read
+            deadline = started + timeout
+        with overrides, span("article.process", url=url, backend=backend) as s:
+            result = process_article(url, backend=backend, deadline=deadline)
+            s.set(success=result is not None, extractive=bool(result and result.extractive))
+        if budget is not None:
+            budget.observe(url, time.monotonic() - started, result is not None)
         
         if result:
             processed.append(result)
-            print(f"✅ Successfully processed: {result['title']}")
+            print(f"✅ Successfully processed: {result.title}")
         else:
             failed.append(url)
             print(f"⚠️  Failed to process: {url}")
     
+    # Report articles in the order they were selected, not the fetch order
+    order = {url: i for i, url in enumerate(list(urls) + [u for u in scheduled if u not in urls])}
+    processed.sort(key=lambda article: order[article.url])
+    
     return {
         "processed": processed,
-        "failed": failed
+        "failed": failed,
+        "skipped": skipped
     }
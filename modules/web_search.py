@@ -3,12 +3,31 @@ try:
 except:
     from tavily.client import TavilyClient
 
-from groq import Groq
+import os
+import re
+import threading
+
 from langchain_core.prompts import PromptTemplate
-from utils.api_keys import get_groq_key, get_tavily_key
+from utils.api_keys import get_tavily_key
+from utils.llm import complete, valid_url_list
+from utils.cache import TTLCache, SingleFlight
+from utils.overload import guarded
+from utils.tracing import span, set_attributes
+from utils.config import get_settings
+from utils.cassette import get_cassette, client_error
+from modules.relevance import rank_by_relevance
+from modules.domain_health import get_domain_registry
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+# "tavily" (default) or "local" for the in-process stand-in backend
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "tavily").lower()
+# Alternative Tavily API endpoint (e.g. a local stand-in server for load tests)
+TAVILY_API_URL = os.getenv("TAVILY_API_URL")
 
-client = Groq(api_key=get_groq_key())
-tavily = TavilyClient(api_key=get_tavily_key())
+_search_cache = TTLCache(ttl=SEARCH_CACHE_TTL, maxsize=512)
+_search_flight = SingleFlight()
+_backend = None
+_backend_lock = threading.Lock()
 
 filter_prompt = PromptTemplate(
     input_variables=["results"],
@@ -22,24 +41,184 @@ Return only URLs, one per line.
 """
 )
 
-def perform_web_search(query: str):
+
+class LocalSearchBackend:
+    """
+    In-process stand-in for TavilyClient, used for tests and offline runs.
+    
+    Args:
+        results (dict): Optional mapping of normalized query -> list of results.
+            Unknown queries get deterministic placeholder results.
+    """
+
+    def __init__(self, results=None):
+        self.results = results or {}
+        self.calls = 0
+
+    def search(self, query: str, max_results: int = 10, **kwargs):
+        self.calls += 1
+        key = normalize_query(query)
+        if key in self.results:
+            return {"results": list(self.results[key])[:max_results]}
+
+        slug = re.sub(r"[^a-z0-9]+", "-", key).strip("-") or "news"
+        return {
+            "results": [
+                {
+                    "title": f"{query} - placeholder story {i}",
+                    "url": f"https://news.example.com/{slug}/story-{i}",
+                    "content": f"Placeholder coverage of {query}.",
+                    "score": round(1.0 - i / 10, 2),
+                }
+                for i in range(1, max_results + 1)
+            ]
+        }
+
+
+def set_search_backend(backend):
+    """
+    Replace the search backend (anything with a Tavily-style `search` method).
+    Clears the result cache so stale results from the old backend are not served.
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend
+    _search_cache.clear()
+
+
+def get_search_backend():
+    """
+    Return the active search backend, creating it on first use.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if SEARCH_BACKEND == "local":
+                _backend = LocalSearchBackend()
+            elif TAVILY_API_URL:
+                _backend = TavilyClient(api_key=get_tavily_key(), api_base_url=TAVILY_API_URL)
+            else:
+                _backend = TavilyClient(api_key=get_tavily_key())
+        return _backend
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache keys (lowercase, collapsed whitespace).
+    """
+    return " ".join(query.lower().split())
+
+
+def _search_backend(query: str, max_results: int):
+    with span("search.backend", query=query, max_results=max_results) as s:
+        with guarded("tavily"):
+            # The backend is only created for live calls, so replays need no API key
+            response = get_cassette().call(
+                "search",
+                {"query": query, "max_results": max_results},
+                lambda: get_search_backend().search(query=query, max_results=max_results),
+                record_error=client_error
+            )
+        results = response.get("results", [])
+        s.set(results=len(results))
+    return results
+
+
+def perform_web_search(query: str, max_results: int = None, use_cache: bool = True):
+    """
+    Search for news articles, with a short-lived result cache and in-flight dedup.
+    
+    Identical concurrent queries share one backend call; repeated queries within
+    SEARCH_CACHE_TTL seconds are served from the cache.
+    
+    Args:
+        query (str): The search query
+        max_results (int): Maximum number of results (defaults to settings.search_max_results)
+        use_cache (bool): Whether to read/write the result cache
+        
+    Returns:
+        List of search results (empty on error)
+    """
+    if max_results is None:
+        max_results = get_settings().search_max_results
+    key = (normalize_query(query), max_results)
+
+    if use_cache:
+        cached = _search_cache.get(key)
+        if cached is not None:
+            set_attributes(search_cache_hit=True)
+            return list(cached)
+
     try:
-        response = tavily.search(query=query, max_results=10)
-        return response.get("results", [])
+        results = _search_flight.do(key, _search_backend, query, max_results)
     except Exception as e:
         print("❌ Tavily error:", e)
         return []
 
-def select_relevant_articles(search_results):
+    if use_cache and results:
+        _search_cache.set(key, results)
+    return list(results)
+
+def merge_search_results(primary, secondary):
+    """
+    Merge two Tavily result lists, keeping order and dropping duplicate URLs.
+    
+    Args:
+        primary: Results that should come first (e.g. from the refined query)
+        secondary: Results appended after the primary ones
+        
+    Returns:
+        List of unique search results
+    """
+    merged = []
+    seen = set()
+    for r in list(primary or []) + list(secondary or []):
+        url = r.get('url', '')
+        if url in seen:
+            continue
+        seen.add(url)
+        merged.append(r)
+    return merged
+
+def _select_with_llm(candidates, settings) -> list:
+    formatted = ""
+    for r in candidates:  # Top candidates for LLM filtering
+        snippet = r.get('content') or r.get('snippet')
+        formatted += f"Title: {r.get('title')}\nURL: {r.get('url')}\nSnippet: {snippet}\n\n"
+
+    prompt = filter_prompt.format(results=formatted)
+
+    raw_output = complete(
+        "selection",
+        prompt,
+        validate=valid_url_list,
+        temperature=settings.temperature,
+        max_tokens=settings.selection_max_tokens
+    )
+
+    # Extract URLs from response
+    return [line.strip() for line in raw_output.split("\n") if line.strip().startswith("http")]
+
+
+def select_relevant_articles(search_results, topic: str = None, with_backups: bool = False, use_llm: bool = True):
     """
     Use LLM to autonomously filter and select the most relevant articles.
     
+    Without the LLM (`use_llm=False`, or when the selection call fails) the top
+    relevance-ranked results are selected instead.
+    
     Args:
         search_results: List of search results from Tavily
+        topic (str): The news topic; when given, results are ranked by semantic
+            relevance and off-topic ones dropped before the LLM sees them
+        with_backups (bool): Also return up to settings.backup_articles of the best
+            remaining candidates, to stand in for articles that fail or get skipped
+        use_llm (bool): Ask the LLM to pick the articles (False in extractive mode)
         
     Returns:
-        List of URLs of the most relevant articles
+        List of URLs of the most relevant articles, or (urls, backup_urls) with `with_backups`
     """
+    settings = get_settings()
     try:
         # Filter out articles that are likely to be problematic
         filtered_results = []
@@ -70,30 +249,35 @@ def select_relevant_articles(search_results):
         if not filtered_results:
             filtered_results = search_results
         
-        formatted = ""
-        for r in filtered_results[:7]:  # Take top 7 for LLM filtering
-            formatted += f"Title: {r.get('title')}\nURL: {r.get('url')}\nSnippet: {r.get('snippet')}\n\n"
-
-        prompt = filter_prompt.format(results=formatted)
-
-        response = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=200
-        )
-
-        # Extract URLs from response
-        raw_output = response.choices[0].message.content.strip()
-        urls = []
+        # Drop results from domains that keep failing to fetch
+        registry = get_domain_registry()
+        healthy_results = [r for r in filtered_results if not registry.is_blocked(r.get('url', ''))]
+        if healthy_results:
+            filtered_results = healthy_results
         
-        for line in raw_output.split("\n"):
-            line = line.strip()
-            if line.startswith("http"):
-                urls.append(line)
+        # Rank by semantic similarity to the topic so the LLM sees the best candidates
+        if topic:
+            try:
+                filtered_results = rank_by_relevance(topic, filtered_results)
+            except Exception as e:
+                print(f"⚠️  Relevance ranking failed, keeping search order: {str(e)}")
         
-        return urls[:5]  # Return top 5 URLs
+        urls = []
+        if use_llm:
+            try:
+                urls = _select_with_llm(filtered_results[:settings.selection_candidates], settings)
+            except Exception as e:
+                print(f"⚠️  LLM article selection failed, using relevance ranking: {str(e)}")
+        if not urls:
+            # Extractive mode or no usable LLM answer: the best-ranked results
+            urls = [r.get('url') for r in filtered_results if r.get('url')]
+        
+        urls = urls[:settings.max_articles]  # Return top URLs
+        if not with_backups:
+            return urls
+        backups = [r.get('url') for r in filtered_results if r.get('url') and r.get('url') not in urls]
+        return urls, backups[:settings.backup_articles]
 
     except Exception as e:
         print("❌ Error in select_relevant_articles:", e)
-        return []
+        return ([], []) if with_backups else []
@@ -0,0 +1,200 @@
+"""
+Record/replay ("cassette") layer for the agent's external calls.
+
+Groq completions, search backend calls and article downloads go through
+`get_cassette().call(...)`. Depending on CASSETTE_MODE:
+
+- "off" (default): calls go straight to the network
+- "record": calls go to the network and each interaction is written to CASSETTE_DIR
+- "replay": interactions are served from CASSETTE_DIR only; a missing one raises CassetteMiss
+- "auto": replay when recorded, otherwise record
+
+Each interaction is one JSON file, `<CASSETTE_DIR>/<kind>/<sha256 of the request>.json`,
+holding the request, the response (or the error) and the recorded latency. On replay
+the recorded latency is slept for, scaled by CASSETTE_LATENCY_SCALE (0 = no delay).
+
+Only deterministic errors are recorded (the caller decides which, e.g. rejected
+downloads or 4xx responses). Transient ones (timeouts, 429s, 5xx, connection resets)
+are raised without being written, so a one-off outage is not replayed forever.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+CASSETTE_MODES = ("off", "record", "replay", "auto")
+CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off").lower()
+CASSETTE_DIR = os.getenv("CASSETTE_DIR", "cassettes")
+CASSETTE_LATENCY_SCALE = float(os.getenv("CASSETTE_LATENCY_SCALE", "0"))
+
+
+class CassetteMiss(Exception):
+    """Raised in replay mode when no interaction was recorded for a request."""
+
+
+class ReplayedError(Exception):
+    """An error recorded on the original call, raised again on replay."""
+
+    def __init__(self, message: str, error_type: str, data: Optional[Dict] = None):
+        super().__init__(message)
+        self.error_type = error_type
+        self.data = data or {}
+
+
+# 4xx statuses that are worth retrying, so never recorded as a fixed outcome
+_TRANSIENT_STATUSES = {408, 425, 429}
+
+
+def client_error(error: Exception) -> bool:
+    """
+    Whether `error` is a deterministic HTTP client error (4xx other than 408/425/429).
+
+    Looks at `error.status_code` (Groq SDK) or `error.response.status_code` (requests).
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in _TRANSIENT_STATUSES
+
+
+def _request_key(kind: str, request: Dict) -> str:
+    canonical = json.dumps({"kind": kind, "request": request}, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    Records external interactions to disk or replays them.
+
+    Args:
+        mode (str): One of CASSETTE_MODES
+        directory (str): Where interactions are stored
+        latency_scale (float): Multiplier for recorded latency on replay
+    """
+
+    def __init__(self, mode: str = CASSETTE_MODE, directory: str = CASSETTE_DIR,
+                 latency_scale: float = CASSETTE_LATENCY_SCALE):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.directory / kind / f"{key}.json"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _write(self, path: Path, entry: Dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_text(json.dumps(entry, indent=1), encoding="utf-8")
+        os.replace(tmp, path)
+        self._count("recorded")
+
+    def _replay(self, entry: Dict, decode: Callable, decode_error: Optional[Callable]):
+        self._count("replayed")
+        if self.latency_scale > 0:
+            time.sleep(entry.get("latency", 0) * self.latency_scale)
+        error = entry.get("error")
+        if error is not None:
+            if decode_error is not None:
+                decode_error(error)
+            raise ReplayedError(error["message"], error["type"], error.get("data"))
+        return decode(entry["response"])
+
+    def call(self, kind: str, request: Dict, fn: Callable, encode: Callable = lambda r: r,
+             decode: Callable = lambda r: r, encode_error: Optional[Callable] = None,
+             decode_error: Optional[Callable] = None, record_error: Optional[Callable] = None):
+        """
+        Run (or replay) one external call.
+
+        Args:
+            kind (str): Interaction type ("groq", "search", "download")
+            request (Dict): JSON-serializable description of the request (the lookup key)
+            fn (Callable): Performs the live call
+            encode (Callable): Live response -> JSON-serializable data
+            decode (Callable): Recorded data -> response as returned by `fn`
+            encode_error (Callable): Exception -> extra JSON data to record with it
+            decode_error (Callable): Recorded error dict -> raises the original exception type
+            record_error (Callable): Exception -> whether it is deterministic and should be
+                recorded (default: errors are never recorded)
+
+        Returns:
+            The live or replayed response
+
+        Raises:
+            CassetteMiss: In replay mode, when the request was never recorded
+        """
+        if self.mode == "off":
+            return fn()
+
+        path = self._path(kind, _request_key(kind, request))
+        if self.mode in ("replay", "auto") and path.exists():
+            return self._replay(json.loads(path.read_text(encoding="utf-8")), decode, decode_error)
+        if self.mode == "replay":
+            self._count("missed")
+            raise CassetteMiss(f"No recorded {kind} interaction for {json.dumps(request, default=str)[:200]}")
+
+        entry = {"kind": kind, "request": request, "recorded_at": time.time()}
+        started = time.monotonic()
+        try:
+            response = fn()
+        except Exception as e:
+            if record_error is None or not record_error(e):
+                raise
+            entry["latency"] = time.monotonic() - started
+            entry["error"] = {
+                "type": type(e).__name__,
+                "message": str(e),
+                "data": encode_error(e) if encode_error else None,
+            }
+            self._write(path, entry)
+            raise
+        entry["latency"] = time.monotonic() - started
+        entry["response"] = encode(response)
+        self._write(path, entry)
+        return response
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Cassette:
+    """
+    Process-wide cassette, configured from CASSETTE_MODE / CASSETTE_DIR / CASSETTE_LATENCY_SCALE.
+    """
+    global _cassette
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette()
+    return _cassette
+
+
+def configure_cassette(mode: str, directory: Optional[str] = None, latency_scale: Optional[float] = None) -> Cassette:
+    """
+    Replace the process-wide cassette (e.g. from a CLI flag or a test harness).
+    """
+    global _cassette
+    with _cassette_lock:
+        _cassette = Cassette(
+            mode,
+            directory if directory is not None else CASSETTE_DIR,
+            latency_scale if latency_scale is not None else CASSETTE_LATENCY_SCALE,
+        )
+    return _cassette
@@ -0,0 +1,241 @@
+"""
+Central pipeline settings.
+
+Settings are resolved in this order (later wins):
+1. Built-in defaults ("balanced")
+2. Deployment profile (NEWS_AGENT_PROFILE or the config file's "profile")
+3. Config file (JSON, path in NEWS_AGENT_CONFIG): {"profile": ..., "settings": {...}, "profiles": {...}}
+   (the same file may carry a "tenants" section for the LLM scheduler)
+4. Environment variables NEWS_AGENT_<FIELD> (e.g. NEWS_AGENT_MAX_ARTICLES=3)
+5. Per-request profile (API "profile", or the tenant's profile): "fast", "balanced",
+   "thorough" or a custom profile; it replaces the deployment profile and is applied
+   on top of steps 3-4, so a chosen profile is never silently overridden
+6. Per-request overrides (API "settings"); only the fields in
+   REQUEST_OVERRIDE_LIMITS may be overridden, within their bounds
+
+The active settings live in a context variable, so every module reads the
+settings of the request it is serving via `get_settings()`.
+"""
+
+import contextvars
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from typing import Dict, Optional
+
+CONFIG_PATH_ENV = "NEWS_AGENT_CONFIG"
+PROFILE_ENV = "NEWS_AGENT_PROFILE"
+ENV_PREFIX = "NEWS_AGENT_"
+
+
+@dataclass(frozen=True)
+class PipelineSettings:
+    """Performance and quality knobs for one pipeline run."""
+
+    # Module 2: search & selection
+    search_max_results: int = 10
+    selection_candidates: int = 7
+    max_articles: int = 5
+    # Extra candidates kept to replace failed articles when running under a latency SLO
+    backup_articles: int = 2
+    selection_max_tokens: int = 200
+    # Module 3: extraction & summarization
+    request_timeout: int = 10
+    fetch_max_bytes: int = 2_000_000
+    fetch_text_chars: int = 20000
+    article_max_chars: int = 4000
+    summary_max_tokens: int = 300
+    # Longer articles are summarized chunk by chunk (map-reduce) instead of truncated
+    chunk_tokens: int = 1000
+    max_chunks: int = 6
+    chunk_summary_max_tokens: int = 150
+    # Module 4: report
+    executive_max_tokens: int = 500
+    # Shared LLM sampling
+    temperature: float = 0.7
+
+
+PROFILES = {
+    "fast": {
+        "search_max_results": 5,
+        "selection_candidates": 5,
+        "max_articles": 3,
+        "request_timeout": 6,
+        "fetch_max_bytes": 1_000_000,
+        "fetch_text_chars": 8000,
+        "article_max_chars": 2500,
+        "summary_max_tokens": 200,
+        "max_chunks": 3,
+        "chunk_summary_max_tokens": 120,
+        "executive_max_tokens": 300,
+        "temperature": 0.3,
+    },
+    "balanced": {},
+    "thorough": {
+        "search_max_results": 15,
+        "selection_candidates": 10,
+        "max_articles": 8,
+        "request_timeout": 15,
+        "fetch_max_bytes": 4_000_000,
+        "fetch_text_chars": 60000,
+        "article_max_chars": 8000,
+        "summary_max_tokens": 400,
+        "max_chunks": 15,
+        "executive_max_tokens": 700,
+    },
+}
+
+# Fields API clients may override per request, with (min, max) bounds. Everything else
+# (download caps, selection budget) is deployment configuration only.
+REQUEST_OVERRIDE_LIMITS = {
+    "search_max_results": (1, 20),
+    "selection_candidates": (1, 15),
+    "max_articles": (1, 10),
+    "backup_articles": (1, 5),
+    "request_timeout": (1, 20),
+    "article_max_chars": (500, 10000),
+    "summary_max_tokens": (50, 600),
+    "chunk_tokens": (200, 4000),
+    "max_chunks": (1, 15),
+    "chunk_summary_max_tokens": (50, 300),
+    "executive_max_tokens": (50, 1000),
+    "temperature": (0.0, 2.0),
+}
+
+_FIELD_TYPES = {f.name: f.type for f in fields(PipelineSettings)}
+_current_settings = contextvars.ContextVar("pipeline_settings", default=None)
+
+
+def _coerce(name: str, value):
+    if name not in _FIELD_TYPES:
+        raise ValueError(f"Unknown setting: {name}")
+    field_type = _FIELD_TYPES[name]
+    try:
+        if field_type in (int, "int"):
+            # Reject 2.7 / True instead of truncating them
+            if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+                raise ValueError
+            value = int(value)
+            if value <= 0:
+                raise ValueError
+        elif field_type in (float, "float"):
+            value = float(value)
+            if value < 0:
+                raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid value for setting {name}: {value!r}")
+    return value
+
+
+def _check_request_overrides(overrides: Dict) -> Dict:
+    checked = {}
+    for name, value in overrides.items():
+        if name not in REQUEST_OVERRIDE_LIMITS:
+            raise ValueError(f"Setting {name} cannot be overridden per request")
+        value = _coerce(name, value)
+        low, high = REQUEST_OVERRIDE_LIMITS[name]
+        if not low <= value <= high:
+            raise ValueError(f"Setting {name} must be between {low} and {high}")
+        checked[name] = value
+    return checked
+
+
+def _apply(settings: PipelineSettings, overrides: Dict) -> PipelineSettings:
+    if not overrides:
+        return settings
+    return replace(settings, **{name: _coerce(name, value) for name, value in overrides.items()})
+
+
+@lru_cache(maxsize=1)
+def _load_config_file() -> Dict:
+    path = os.getenv(CONFIG_PATH_ENV)
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️  Could not load settings file {path}: {str(e)}")
+        return {}
+
+
+def available_profiles() -> Dict[str, Dict]:
+    """
+    Built-in profiles merged with custom profiles from the config file.
+    """
+    profiles = dict(PROFILES)
+    profiles.update(_load_config_file().get("profiles", {}))
+    return profiles
+
+
+def available_tenants() -> Dict[str, Dict]:
+    """
+    Tenant policies from the config file's "tenants" section (see utils/scheduler.py).
+    """
+    return dict(_load_config_file().get("tenants", {}))
+
+
+def load_settings(profile: Optional[str] = None, overrides: Optional[Dict] = None) -> PipelineSettings:
+    """
+    Resolve settings from defaults, profile, config file, environment and overrides.
+
+    Args:
+        profile (Optional[str]): Per-request profile name, applied on top of the deployment
+            settings; without it the file/env profile (or "balanced") is used as the base
+        overrides (Optional[Dict]): Per-request field overrides (see REQUEST_OVERRIDE_LIMITS)
+
+    Returns:
+        PipelineSettings
+
+    Raises:
+        ValueError: For unknown profiles, unknown fields, invalid values or overrides
+            outside REQUEST_OVERRIDE_LIMITS
+    """
+    config = _load_config_file()
+    profiles = available_profiles()
+    if profile is not None and profile not in profiles:
+        raise ValueError(f"Unknown profile: {profile}")
+    deployment_profile = os.getenv(PROFILE_ENV) or config.get("profile") or "balanced"
+    if deployment_profile not in profiles:
+        raise ValueError(f"Unknown profile: {deployment_profile}")
+
+    # A requested profile replaces the deployment profile but not the deployment settings
+    settings = PipelineSettings() if profile else _apply(PipelineSettings(), profiles[deployment_profile])
+    settings = _apply(settings, config.get("settings", {}))
+
+    env_overrides = {
+        name: os.environ[ENV_PREFIX + name.upper()]
+        for name in _FIELD_TYPES
+        if ENV_PREFIX + name.upper() in os.environ
+    }
+    settings = _apply(settings, env_overrides)
+    if profile:
+        settings = _apply(settings, profiles[profile])
+    return _apply(settings, _check_request_overrides(overrides or {}))
+
+
+@lru_cache(maxsize=1)
+def _default_settings() -> PipelineSettings:
+    return load_settings()
+
+
+def get_settings() -> PipelineSettings:
+    """
+    Settings for the current request, or the deployment defaults.
+    """
+    return _current_settings.get() or _default_settings()
+
+
+@contextmanager
+def use_settings(settings: PipelineSettings):
+    """
+    Make `settings` the active settings for the enclosed block (and tasks it spawns
+    with `submit_with_context`).
+    """
+    token = _current_settings.set(settings)
+    try:
+        yield settings
+    finally:
+        _current_settings.reset(token)
@@ -0,0 +1,171 @@
+"""
+LLM access shared by all modules, with per-stage model routing.
+
+Each pipeline stage maps to a model tier ("fast" or "large"). Cheap stages run on the
+fast model and escalate to the large model automatically when the output fails the
+stage's validator or the call errors.
+
+Per-stage overrides: GROQ_MODEL_<STAGE> (e.g. GROQ_MODEL_EXECUTIVE=fast or a model id).
+
+Calls are queued per tenant and priority class by the LLM scheduler (utils/scheduler.py)
+and can be recorded/replayed by the cassette layer (utils/cassette.py).
+"""
+
+import os
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+from groq import Groq
+from utils.api_keys import get_groq_key
+from utils.overload import BackendOverloaded
+from utils.scheduler import get_scheduler
+from utils.tracing import span
+from utils.cassette import get_cassette, client_error
+
+# Replays never reach Groq, so they run without a real key
+client = Groq(api_key=get_groq_key() or ("cassette-replay" if get_cassette().replaying else None))
+
+MODEL_TIERS = {
+    "fast": os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant"),
+    "large": os.getenv("GROQ_LARGE_MODEL", "llama-3.3-70b-versatile"),
+}
+
+# Default tier for each pipeline stage
+STAGE_TIERS = {
+    "query": "fast",
+    "selection": "fast",
+    "summary_short": "fast",
+    "summary_long": "large",
+    "summary_chunk": "fast",
+    "executive": "large",
+}
+
+# Articles longer than this (characters) use the "summary_long" stage
+LONG_ARTICLE_CHARS = int(os.getenv("LONG_ARTICLE_CHARS", "2500"))
+
+
+def model_for_stage(stage: str) -> str:
+    """
+    Resolve the model id for a stage (env override, then stage tier).
+    """
+    choice = os.getenv(f"GROQ_MODEL_{stage.upper()}") or STAGE_TIERS.get(stage, "large")
+    return MODEL_TIERS.get(choice, choice)
+
+
+def escalation_chain(stage: str) -> List[str]:
+    """
+    Models to try for a stage, in order: the stage model, then the large model.
+    """
+    chain = [model_for_stage(stage)]
+    if MODEL_TIERS["large"] not in chain:
+        chain.append(MODEL_TIERS["large"])
+    return chain
+
+
+def _encode_completion(response) -> dict:
+    usage = getattr(response, "usage", None)
+    return {
+        "content": response.choices[0].message.content,
+        "usage": None if usage is None else {
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "total_tokens": getattr(usage, "total_tokens", None),
+        },
+    }
+
+
+def _decode_completion(data: dict):
+    usage = data.get("usage")
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=data.get("content")))],
+        usage=SimpleNamespace(**usage) if usage else None,
+    )
+
+
+def _chat_completion(model: str, prompt: str, params: dict):
+    messages = [{"role": "user", "content": prompt}]
+    return get_cassette().call(
+        "groq",
+        {"model": model, "messages": messages, "params": params},
+        lambda: client.chat.completions.create(model=model, messages=messages, **params),
+        encode=_encode_completion,
+        decode=_decode_completion,
+        record_error=client_error,
+    )
+
+
+def estimate_tokens(prompt: str, params: dict) -> int:
+    """
+    Rough prompt + completion token count for a call (about 4 characters per token).
+    """
+    return len(prompt) // 4 + int(params.get("max_tokens") or 256)
+
+
+def complete(stage: str, prompt: str, validate: Optional[Callable[[str], bool]] = None, **params) -> str:
+    """
+    Run a single-prompt chat completion for a pipeline stage.
+
+    Args:
+        stage (str): Stage name (see STAGE_TIERS)
+        prompt (str): The user prompt
+        validate (Optional[Callable]): Returns False for unusable output, which triggers escalation
+        **params: Extra completion parameters (temperature, max_tokens, ...)
+
+    Returns:
+        str: The stripped model output (the last one if every model failed validation)
+
+    Raises:
+        Exception: The last API error if no model returned output
+    """
+    output = None
+    last_error = None
+    for model in escalation_chain(stage):
+        try:
+            with span("llm.chat", stage=stage, model=model, prompt_chars=len(prompt)) as s:
+                with get_scheduler().slot(estimate_tokens(prompt, params)) as call:
+                    response = _chat_completion(model, prompt, params)
+                    usage = getattr(response, "usage", None)
+                    if usage is not None:
+                        call.record(getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None))
+                output = (response.choices[0].message.content or "").strip()
+                if usage is not None:
+                    s.set(
+                        prompt_tokens=getattr(usage, "prompt_tokens", None),
+                        completion_tokens=getattr(usage, "completion_tokens", None),
+                        total_tokens=getattr(usage, "total_tokens", None)
+                    )
+                s.set(output_chars=len(output))
+        except BackendOverloaded:
+            # Every model shares the Groq limiter and tenant quota; escalating would only queue again
+            raise
+        except Exception as e:
+            last_error = e
+            print(f"⚠️  [{stage}] {model} failed: {str(e)}")
+            continue
+
+        if validate is None or validate(output):
+            return output
+        print(f"⚠️  [{stage}] {model} output failed validation, escalating")
+
+    if output is None:
+        raise last_error
+    return output
+
+
+# ---- Stage validators ----
+
+def valid_query(text: str) -> bool:
+    return 0 < len(text) <= 200 and "\n" not in text.strip()
+
+
+def valid_url_list(text: str) -> bool:
+    return any(line.strip().startswith("http") for line in text.split("\n"))
+
+
+def valid_summary(text: str) -> bool:
+    lowered = text.lower()
+    return len(text) >= 40 and not lowered.startswith(("i cannot", "i can't", "i'm sorry", "sorry"))
+
+
+def valid_executive_summary(text: str) -> bool:
+    return len(text) >= 80 and valid_summary(text)
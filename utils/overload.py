@@ -0,0 +1,294 @@
+"""
+Overload control for the agent.
+
+- AIMDLimiter: adaptive concurrency limit per backend (groq, tavily, fetch).
+  The limit grows additively while calls are fast and halves on errors or slow calls.
+- AdmissionController: bounds concurrent pipeline runs in the API server and sheds
+  requests (503 + Retry-After) when the expected queue wait is too long. Batch
+  requests yield to queued interactive ones and may only hold part of the slots.
+- choose_degraded_mode: picks the cheapest acceptable pipeline mode for a latency budget.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Seconds a call may wait for a backend slot before failing fast
+BACKEND_QUEUE_TIMEOUT = float(os.getenv("BACKEND_QUEUE_TIMEOUT", "10"))
+# Concurrent pipeline runs per server process and the longest acceptable queue wait
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+MAX_QUEUE_WAIT = float(os.getenv("MAX_QUEUE_WAIT", "15"))
+# Pipeline slots that batch-priority requests may hold at once
+MAX_CONCURRENT_BATCH_REQUESTS = int(os.getenv("MAX_CONCURRENT_BATCH_REQUESTS", str(max(1, MAX_CONCURRENT_REQUESTS // 2))))
+# Default end-to-end latency budget for one /api/summarize call
+PIPELINE_LATENCY_BUDGET = float(os.getenv("PIPELINE_LATENCY_BUDGET", "45"))
+
+# Pipeline modes, from best quality to cheapest
+MODE_FULL = "full"
+MODE_NO_EXECUTIVE = "no_executive"
+MODE_EXTRACTIVE = "extractive"
+MODE_CACHED = "cached"
+DEGRADED_MODES = (MODE_FULL, MODE_NO_EXECUTIVE, MODE_EXTRACTIVE, MODE_CACHED)
+
+
+class BackendOverloaded(Exception):
+    """Raised when no backend slot became free within the queue timeout."""
+
+
+class AIMDLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency limiter.
+
+    Args:
+        name (str): Backend name (for messages)
+        initial (int): Starting concurrency limit
+        min_limit (int): Lower bound for the limit
+        max_limit (int): Upper bound for the limit
+        latency_target (float): Calls slower than this (seconds) count as congestion
+    """
+
+    def __init__(self, name: str, initial: int = 8, min_limit: int = 1, max_limit: int = 32,
+                 latency_target: float = 5.0):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self.waiting = 0
+        self.ewma_latency = None
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float = BACKEND_QUEUE_TIMEOUT) -> bool:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                while self.in_flight >= int(self.limit):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.in_flight += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self, latency: float, ok: bool = True):
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            self.ewma_latency = latency if self.ewma_latency is None else 0.8 * self.ewma_latency + 0.2 * latency
+            if ok and latency <= self.latency_target:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            elif now - self._last_decrease > latency:
+                # Decrease at most once per observed round-trip
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = now
+            self._cond.notify_all()
+
+    def note_waiting(self, delta: int):
+        """
+        Count callers queued outside `acquire()` (e.g. in the LLM scheduler) as waiting,
+        so `pressure()` and `expected_latency()` see that backlog too.
+        """
+        with self._cond:
+            self.waiting += delta
+
+    def pressure(self) -> float:
+        """
+        Queued plus in-flight calls relative to the current limit (1.0 = saturated).
+        """
+        with self._cond:
+            return (self.in_flight + self.waiting) / max(self.limit, 1.0)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            }
+
+
+_limiters = {
+    "groq": AIMDLimiter("groq", initial=8, max_limit=int(os.getenv("GROQ_MAX_CONCURRENCY", "32")), latency_target=8.0),
+    "tavily": AIMDLimiter("tavily", initial=4, max_limit=int(os.getenv("TAVILY_MAX_CONCURRENCY", "16")), latency_target=5.0),
+    "fetch": AIMDLimiter("fetch", initial=16, max_limit=int(os.getenv("FETCH_MAX_CONCURRENCY", "64")), latency_target=8.0),
+}
+
+# Typical latencies (seconds) used until a backend has been observed
+_DEFAULT_LATENCY = {"groq": 2.0, "tavily": 1.5, "fetch": 1.5}
+
+
+def get_limiter(backend: str) -> AIMDLimiter:
+    return _limiters[backend]
+
+
+@contextmanager
+def guarded(backend: str, timeout: float = BACKEND_QUEUE_TIMEOUT):
+    """
+    Run a backend call under that backend's adaptive concurrency limit.
+
+    Raises:
+        BackendOverloaded: If no slot frees up within `timeout` seconds
+    """
+    limiter = _limiters[backend]
+    if not limiter.acquire(timeout):
+        raise BackendOverloaded(f"{backend} overloaded: no slot within {timeout:.0f}s")
+    started = time.monotonic()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        limiter.release(time.monotonic() - started, ok)
+
+
+def backend_stats() -> Dict:
+    return {name: limiter.stats() for name, limiter in _limiters.items()}
+
+
+def expected_latency(backend: str) -> float:
+    """
+    Expected latency (seconds) of the next call to a backend, including queueing.
+    """
+    limiter = _limiters[backend]
+    latency = limiter.ewma_latency or _DEFAULT_LATENCY[backend]
+    # Saturated backends add queueing delay roughly proportional to the backlog
+    return latency * max(1.0, limiter.pressure())
+
+
+def estimate_pipeline_latency(mode: str, articles: int = 5) -> float:
+    """
+    Rough end-to-end latency estimate for a pipeline mode from observed backend latencies.
+    """
+    if mode == MODE_CACHED:
+        return 0.0
+    groq = expected_latency("groq")
+    tavily = expected_latency("tavily")
+    fetch = expected_latency("fetch")
+    # Query generation + search + URL selection
+    estimate = groq + tavily + groq + articles * fetch
+    if mode in (MODE_FULL, MODE_NO_EXECUTIVE):
+        estimate += articles * groq
+    if mode == MODE_FULL:
+        estimate += groq
+    return estimate
+
+
+def choose_degraded_mode(budget: float, articles: int = 5) -> str:
+    """
+    Pick the best-quality mode whose estimated latency fits the budget.
+
+    Args:
+        budget (float): Remaining latency budget in seconds
+        articles (int): Articles the pipeline expects to process
+
+    Returns:
+        str: One of DEGRADED_MODES
+    """
+    for mode in (MODE_FULL, MODE_NO_EXECUTIVE, MODE_EXTRACTIVE):
+        if estimate_pipeline_latency(mode, articles) <= budget:
+            return mode
+    return MODE_CACHED
+
+
+class AdmissionController:
+    """
+    Bounds concurrent pipeline runs and sheds load based on queue time.
+
+    Args:
+        max_concurrent (int): Pipeline runs allowed at once
+        max_queue_wait (float): Longest a request may wait for a slot (seconds)
+        max_batch (int): Slots batch-priority requests may hold at once
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_REQUESTS, max_queue_wait: float = MAX_QUEUE_WAIT,
+                 max_batch: int = MAX_CONCURRENT_BATCH_REQUESTS):
+        self.max_concurrent = max_concurrent
+        self.max_queue_wait = max_queue_wait
+        self.max_batch = max_batch
+        self.active = 0
+        self.active_batch = 0
+        self.queued = 0
+        self.queued_interactive = 0
+        self.shed = 0
+        self.ewma_service_time = None
+        self._cond = threading.Condition()
+
+    def _expected_wait_locked(self) -> float:
+        if self.active < self.max_concurrent:
+            return 0.0
+        service = self.ewma_service_time or 10.0
+        return (self.queued + 1) * service / self.max_concurrent
+
+    def retry_after(self) -> int:
+        """
+        Suggested Retry-After seconds for shed requests.
+        """
+        with self._cond:
+            return max(1, int(self._expected_wait_locked() + 0.5))
+
+    def _blocked_locked(self, batch: bool) -> bool:
+        if self.active >= self.max_concurrent:
+            return True
+        return batch and (self.queued_interactive > 0 or self.active_batch >= self.max_batch)
+
+    def enter(self, batch: bool = False) -> Optional[float]:
+        """
+        Wait for a pipeline slot.
+
+        Args:
+            batch (bool): Batch-priority request (yields to interactive requests)
+
+        Returns:
+            float: Seconds spent queued, or None if the request was shed
+        """
+        started = time.monotonic()
+        with self._cond:
+            # Shed immediately when the predicted wait already exceeds the limit
+            if self._expected_wait_locked() > self.max_queue_wait:
+                self.shed += 1
+                return None
+            self.queued += 1
+            if not batch:
+                self.queued_interactive += 1
+            try:
+                while self._blocked_locked(batch):
+                    remaining = self.max_queue_wait - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self.shed += 1
+                        return None
+                    self._cond.wait(remaining)
+                self.active += 1
+                if batch:
+                    self.active_batch += 1
+            finally:
+                self.queued -= 1
+                if not batch:
+                    self.queued_interactive -= 1
+                    # Batch requests waiting behind this one may proceed now
+                    self._cond.notify_all()
+        return time.monotonic() - started
+
+    def leave(self, service_time: float, batch: bool = False):
+        with self._cond:
+            self.active -= 1
+            if batch:
+                self.active_batch -= 1
+            self.ewma_service_time = (
+                service_time if self.ewma_service_time is None
+                else 0.8 * self.ewma_service_time + 0.2 * service_time
+            )
+            self._cond.notify_all()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {"active": self.active, "active_batch": self.active_batch, "queued": self.queued,
+                    "queued_interactive": self.queued_interactive, "shed": self.shed,
+                    "ewma_service_time": self.ewma_service_time}
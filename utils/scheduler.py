@@ -0,0 +1,399 @@
+"""
+Multi-tenant scheduling of LLM calls.
+
+Every Groq call made by the pipeline goes through `LLMScheduler.slot()`, which decides
+who gets the next free Groq slot (the number of slots is still set by the adaptive
+"groq" limiter in utils/overload.py):
+
+- Priority classes: queued "interactive" calls always go before "batch" calls, and
+  batch calls may hold at most LLM_BATCH_SHARE of the slots, so interactive requests
+  find free capacity even while batch jobs run.
+- Weighted fair queuing within a class: each call gets a virtual finish time of
+  (estimated tokens / tenant weight), so one tenant with many queued calls cannot
+  starve the other tenants of its class.
+- Quotas per tenant: requests per minute (checked by the API) and LLM tokens per
+  minute (checked before every call; raises QuotaExceeded).
+- Usage accounting per tenant (GET /api/usage).
+
+Tenants come from the "tenants" section of the settings file (NEWS_AGENT_CONFIG):
+
+    {"tenants": {"acme-batch": {"api_keys": ["..."], "weight": 1, "priority": "batch",
+                                "requests_per_minute": 30, "tokens_per_minute": 200000,
+                                "profile": "fast"}}}
+
+A tenant's "profile" is the settings profile its requests use unless they name one.
+
+Requests without a known API key run as the "default" tenant (which can be
+configured the same way). The active tenant lives in a context variable.
+"""
+
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from utils.config import available_profiles, available_tenants
+from utils.overload import BackendOverloaded, BACKEND_QUEUE_TIMEOUT, get_limiter
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+_PRIORITY_RANK = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+DEFAULT_TENANT = "default"
+# Largest share of Groq slots that batch calls may hold at once
+LLM_BATCH_SHARE = float(os.getenv("LLM_BATCH_SHARE", "0.5"))
+# Batch calls may queue longer than interactive ones before giving up
+LLM_BATCH_QUEUE_TIMEOUT = float(os.getenv("LLM_BATCH_QUEUE_TIMEOUT", "60"))
+QUOTA_WINDOW = 60.0
+
+
+class QuotaExceeded(BackendOverloaded):
+    """Raised when a tenant is over its LLM token quota."""
+
+
+@dataclass(frozen=True)
+class TenantPolicy:
+    """Scheduling weight, highest priority class, quotas and settings profile of one tenant."""
+
+    name: str
+    weight: float = 1.0
+    priority: str = PRIORITY_INTERACTIVE
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    profile: Optional[str] = None
+
+
+_POLICY_FIELDS = {f.name for f in fields(TenantPolicy)} - {"name"}
+_current_tenant = contextvars.ContextVar("llm_tenant", default=None)
+
+
+@lru_cache(maxsize=1)
+def _tenant_policies() -> Tuple[Dict[str, TenantPolicy], Dict[str, str]]:
+    policies = {DEFAULT_TENANT: TenantPolicy(DEFAULT_TENANT)}
+    key_to_tenant = {}
+    for name, config in available_tenants().items():
+        try:
+            policy = TenantPolicy(name, **{k: v for k, v in config.items() if k in _POLICY_FIELDS})
+            if policy.priority not in PRIORITIES or policy.weight <= 0:
+                raise ValueError("invalid priority or weight")
+            if policy.profile is not None and policy.profile not in available_profiles():
+                raise ValueError(f"unknown profile {policy.profile}")
+        except (TypeError, ValueError) as e:
+            print(f"⚠️  Ignoring tenant {name}: {str(e)}")
+            continue
+        policies[name] = policy
+        for key in config.get("api_keys", []):
+            key_to_tenant[key] = name
+    return policies, key_to_tenant
+
+
+def resolve_tenant(api_key: Optional[str]) -> TenantPolicy:
+    """
+    Tenant policy for an API key (the default tenant for unknown or missing keys).
+    """
+    policies, key_to_tenant = _tenant_policies()
+    return policies[key_to_tenant.get(api_key or "", DEFAULT_TENANT)]
+
+
+def resolve_priority(policy: TenantPolicy, requested: Optional[str]) -> str:
+    """
+    Priority class for a request: the requested class, capped at the tenant's class.
+
+    Raises:
+        ValueError: For unknown priority classes
+    """
+    if requested is None:
+        return policy.priority
+    if requested not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {requested}")
+    return max(requested, policy.priority, key=_PRIORITY_RANK.get)
+
+
+def current_tenant() -> Tuple[TenantPolicy, str]:
+    """
+    (policy, priority) of the request being served, or the default tenant.
+    """
+    current = _current_tenant.get()
+    if current is None:
+        policy = resolve_tenant(None)
+        return policy, policy.priority
+    return current
+
+
+@contextmanager
+def use_tenant(policy: TenantPolicy, priority: str):
+    """
+    Bill and schedule LLM calls in the enclosed block (and tasks it spawns with
+    `submit_with_context`) to `policy` at `priority`.
+    """
+    token = _current_tenant.set((policy, priority))
+    try:
+        yield policy
+    finally:
+        _current_tenant.reset(token)
+
+
+class _Window:
+    """Amounts recorded over the last QUOTA_WINDOW seconds."""
+
+    def __init__(self):
+        self.entries = deque()
+        self.total = 0
+
+    def _expire(self, now: float):
+        while self.entries and self.entries[0][0] <= now - QUOTA_WINDOW:
+            self.total -= self.entries.popleft()[1]
+
+    def add(self, amount: int, now: float):
+        self._expire(now)
+        self.entries.append((now, amount))
+        self.total += amount
+
+    def current(self, now: float) -> int:
+        self._expire(now)
+        return self.total
+
+    def retry_after(self, now: float) -> float:
+        self._expire(now)
+        return self.entries[0][0] + QUOTA_WINDOW - now if self.entries else 0.0
+
+
+class _Call:
+    """Handle for one scheduled LLM call; `record()` bills the actual token usage."""
+
+    def __init__(self, scheduler: "LLMScheduler", tenant: str, estimated_tokens: int):
+        self._scheduler = scheduler
+        self._tenant = tenant
+        self._estimated_tokens = estimated_tokens
+        self._recorded = False
+
+    def record(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+        self._recorded = True
+        self._scheduler._bill(self._tenant, prompt_tokens or 0, completion_tokens or 0)
+
+    def _finish(self):
+        if not self._recorded:
+            # No usage reported: bill the estimate so quotas still apply
+            self._scheduler._bill(self._tenant, self._estimated_tokens, 0)
+
+
+def _new_usage() -> Dict:
+    return {
+        "requests": 0,
+        "rejected_requests": 0,
+        "llm_calls": 0,
+        "llm_rejected": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "queue_wait_seconds": 0.0,
+        "max_queue_wait_seconds": 0.0,
+        "calls_by_priority": {p: 0 for p in PRIORITIES},
+    }
+
+
+class LLMScheduler:
+    """
+    Priority + weighted-fair-queuing scheduler in front of the Groq limiter.
+
+    Args:
+        backend (str): Limiter whose slots are handed out (see utils/overload.py)
+        batch_share (float): Largest share of the slots batch calls may hold
+    """
+
+    def __init__(self, backend: str = "groq", batch_share: float = LLM_BATCH_SHARE):
+        self.backend = backend
+        self.limiter = get_limiter(backend)
+        self.batch_share = batch_share
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._in_flight = {p: 0 for p in PRIORITIES}
+        self._virtual_time = 0.0
+        self._last_finish = {}
+        self._seq = itertools.count()
+        self._usage = {}
+        self._request_windows = {}
+        self._token_windows = {}
+
+    def _usage_locked(self, tenant: str) -> Dict:
+        if tenant not in self._usage:
+            self._usage[tenant] = _new_usage()
+            self._request_windows[tenant] = _Window()
+            self._token_windows[tenant] = _Window()
+        return self._usage[tenant]
+
+    def check_request(self, policy: TenantPolicy) -> Optional[int]:
+        """
+        Count a new request against the tenant's requests-per-minute quota.
+
+        Returns:
+            int: Retry-After seconds if the quota is exhausted, otherwise None
+        """
+        now = time.monotonic()
+        with self._cond:
+            usage = self._usage_locked(policy.name)
+            window = self._request_windows[policy.name]
+            if policy.requests_per_minute and window.current(now) >= policy.requests_per_minute:
+                usage["rejected_requests"] += 1
+                return max(1, int(window.retry_after(now) + 0.5))
+            window.add(1, now)
+            usage["requests"] += 1
+            return None
+
+    def _may_dispatch_locked(self, priority: str) -> bool:
+        if priority == PRIORITY_BATCH:
+            batch_slots = max(1, int(self.limiter.limit * self.batch_share))
+            return self._in_flight[PRIORITY_BATCH] < batch_slots
+        return True
+
+    def _acquire(self, policy: TenantPolicy, priority: str, cost: int, timeout: float) -> float:
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            usage = self._usage_locked(policy.name)
+            tokens = self._token_windows[policy.name]
+            used = tokens.current(started)
+            # A single oversized call is still allowed when nothing else was used
+            if policy.tokens_per_minute and used and used + cost > policy.tokens_per_minute:
+                usage["llm_rejected"] += 1
+                raise QuotaExceeded(f"tenant {policy.name} over its LLM token quota "
+                                    f"({used}/{policy.tokens_per_minute} tokens per minute)")
+
+            start_tag = max(self._virtual_time, self._last_finish.get(policy.name, 0.0))
+            finish_tag = start_tag + cost / policy.weight
+            self._last_finish[policy.name] = finish_tag
+            waiter = (_PRIORITY_RANK[priority], finish_tag, next(self._seq))
+            self._waiting.append(waiter)
+            # Queued calls count as groq backlog for degraded-mode and budget estimates
+            self.limiter.note_waiting(1)
+            try:
+                while not (waiter == min(self._waiting)
+                           and self._may_dispatch_locked(priority)
+                           and self.limiter.acquire(timeout=0)):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        usage["llm_rejected"] += 1
+                        raise BackendOverloaded(f"{self.backend} overloaded: no slot within {timeout:.0f}s "
+                                                f"({priority})")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(waiter)
+                self.limiter.note_waiting(-1)
+                # The next waiter in line may be dispatchable now
+                self._cond.notify_all()
+
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self._in_flight[priority] += 1
+            waited = time.monotonic() - started
+            usage["llm_calls"] += 1
+            usage["calls_by_priority"][priority] += 1
+            usage["queue_wait_seconds"] += waited
+            usage["max_queue_wait_seconds"] = max(usage["max_queue_wait_seconds"], waited)
+            return waited
+
+    def _release(self, priority: str, latency: float, ok: bool):
+        self.limiter.release(latency, ok)
+        with self._cond:
+            self._in_flight[priority] -= 1
+            self._cond.notify_all()
+
+    def _bill(self, tenant: str, prompt_tokens: int, completion_tokens: int):
+        with self._cond:
+            usage = self._usage_locked(tenant)
+            usage["prompt_tokens"] += prompt_tokens
+            usage["completion_tokens"] += completion_tokens
+            usage["total_tokens"] += prompt_tokens + completion_tokens
+            self._token_windows[tenant].add(prompt_tokens + completion_tokens, time.monotonic())
+
+    @contextmanager
+    def slot(self, estimated_tokens: int, timeout: Optional[float] = None):
+        """
+        Wait for a Groq slot on behalf of the current tenant and hold it for one call.
+
+        Args:
+            estimated_tokens (int): Expected prompt + completion tokens (the WFQ cost)
+            timeout (Optional[float]): Longest queue wait; defaults by priority class
+
+        Yields:
+            A call handle; pass the response usage to `record()`
+
+        Raises:
+            QuotaExceeded: The tenant is over its token quota
+            BackendOverloaded: No slot became free within the timeout
+        """
+        policy, priority = current_tenant()
+        if timeout is None:
+            timeout = LLM_BATCH_QUEUE_TIMEOUT if priority == PRIORITY_BATCH else BACKEND_QUEUE_TIMEOUT
+        cost = max(1, estimated_tokens)
+        self._acquire(policy, priority, cost, timeout)
+        call = _Call(self, policy.name, cost)
+        started = time.monotonic()
+        ok = False
+        try:
+            yield call
+            ok = True
+        finally:
+            self._release(priority, time.monotonic() - started, ok)
+            call._finish()
+
+    def usage(self, tenant: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Usage counters per tenant, with the current per-minute window and quotas.
+        """
+        policies, _ = _tenant_policies()
+        now = time.monotonic()
+        with self._cond:
+            if tenant:
+                names = [tenant] if tenant in self._usage or tenant in policies else []
+            else:
+                names = sorted(set(self._usage) | set(policies))
+            report = {}
+            for name in names:
+                usage = self._usage_locked(name)
+                policy = policies.get(name, TenantPolicy(name))
+                report[name] = dict(
+                    usage,
+                    calls_by_priority=dict(usage["calls_by_priority"]),
+                    queue_wait_seconds=round(usage["queue_wait_seconds"], 3),
+                    max_queue_wait_seconds=round(usage["max_queue_wait_seconds"], 3),
+                    requests_last_minute=self._request_windows[name].current(now),
+                    tokens_last_minute=self._token_windows[name].current(now),
+                    policy={
+                        "weight": policy.weight,
+                        "priority": policy.priority,
+                        "requests_per_minute": policy.requests_per_minute,
+                        "tokens_per_minute": policy.tokens_per_minute,
+                        "profile": policy.profile,
+                    },
+                )
+            return report
+
+    def stats(self) -> Dict:
+        with self._cond:
+            waiting = {p: 0 for p in PRIORITIES}
+            for rank, _, _ in self._waiting:
+                waiting[PRIORITIES[rank]] += 1
+            return {"waiting": waiting, "in_flight": dict(self._in_flight)}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """
+    Process-wide LLM scheduler.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler()
+    return _scheduler
@@ -0,0 +1,265 @@
+"""
+Request-scoped tracing for the agent pipeline.
+
+A trace id is carried in a context variable through all modules; `span()` opens
+nested spans for each step and external call. Finished traces are exported as
+OpenTelemetry (OTLP/JSON) resource spans to a local file (TRACE_EXPORT_PATH, one
+JSON document per line) and/or an OTLP/HTTP collector (TRACE_COLLECTOR_URL). Collector
+posts go through one background thread fed by a bounded queue; traces are dropped
+(and counted) when the collector cannot keep up.
+
+Outside a trace, `span()` is a no-op, so modules can be used on their own.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+TRACE_COLLECTOR_URL = os.getenv("TRACE_COLLECTOR_URL", "")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "smart-news-summarizer")
+# Traces waiting for the collector; new ones are dropped once it is full
+TRACE_EXPORT_QUEUE_SIZE = int(os.getenv("TRACE_EXPORT_QUEUE_SIZE", "256"))
+
+_STATUS_OK = 1
+_STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+_collector_queue = queue.Queue(maxsize=TRACE_EXPORT_QUEUE_SIZE)
+_collector_thread = None
+_collector_lock = threading.Lock()
+_dropped_traces = 0
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None, attributes: Optional[Dict] = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = _STATUS_OK
+        self.status_message = ""
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [_otlp_attribute(k, v) for k, v in self.attributes.items() if v is not None],
+            "status": {"code": self.status, "message": self.status_message},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _NoopSpan:
+    """Stand-in yielded by `span()` when no trace is active."""
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[str]:
+    """
+    Extract the trace id from a W3C `traceparent` header, if valid.
+    """
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32:
+        return None
+    try:
+        int(parts[1], 16)
+    except ValueError:
+        return None
+    return parts[1].lower()
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current_span.get()
+    return current.trace.trace_id if current is not None else None
+
+
+def set_attributes(**attributes):
+    """
+    Add attributes to the innermost active span (no-op outside a trace).
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+@contextmanager
+def _run_span(span: Span):
+    token = _current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.status = _STATUS_ERROR
+        span.status_message = str(e)[:200]
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        span.trace.add(span)
+
+
+@contextmanager
+def start_trace(name: str, trace_id: Optional[str] = None, **attributes):
+    """
+    Start a new trace with a root span; exports all spans when it ends.
+    If a trace is already active, this just opens a child span.
+
+    Args:
+        name (str): Root span name
+        trace_id (Optional[str]): Continue an existing trace id (e.g. from `traceparent`)
+        **attributes: Root span attributes
+    """
+    if _current_span.get() is not None:
+        with span(name, **attributes) as child:
+            yield child
+        return
+
+    trace = Trace(trace_id)
+    root = Span(trace, name, attributes=attributes)
+    try:
+        with _run_span(root):
+            yield root
+    finally:
+        export_trace(trace)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Open a child span of the current span (no-op when no trace is active).
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP_SPAN
+        return
+    with _run_span(Span(parent.trace, name, parent.span_id, attributes)) as child:
+        yield child
+
+
+def submit_with_context(executor, fn, *args, **kwargs):
+    """
+    Submit work to an executor so it runs inside the caller's trace context.
+    """
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+def trace_to_otlp(trace: Trace) -> Dict:
+    """
+    Convert a finished trace into an OTLP/JSON `ExportTraceServiceRequest`.
+    """
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{
+                "scope": {"name": "news-agent"},
+                "spans": [s.to_otlp() for s in trace.spans],
+            }],
+        }]
+    }
+
+
+def _post_to_collector(payload: Dict):
+    try:
+        import requests
+        requests.post(
+            TRACE_COLLECTOR_URL.rstrip("/") + "/v1/traces",
+            data=json.dumps(payload),
+            headers={"Content-Type": "application/json"},
+            timeout=2,
+        )
+    except Exception as e:
+        print(f"⚠️  Trace export to collector failed: {str(e)}")
+
+
+def _collector_worker():
+    while True:
+        _post_to_collector(_collector_queue.get())
+
+
+def _enqueue_for_collector(payload: Dict):
+    global _collector_thread, _dropped_traces
+    if _collector_thread is None:
+        with _collector_lock:
+            if _collector_thread is None:
+                _collector_thread = threading.Thread(target=_collector_worker, name="trace-exporter", daemon=True)
+                _collector_thread.start()
+    try:
+        _collector_queue.put_nowait(payload)
+    except queue.Full:
+        with _collector_lock:
+            _dropped_traces += 1
+            dropped = _dropped_traces
+        if dropped == 1 or dropped % 100 == 0:
+            print(f"⚠️  Trace export queue full, {dropped} traces dropped so far")
+
+
+def export_trace(trace: Trace):
+    """
+    Write the trace to the configured file and/or collector.
+    """
+    if not trace.spans or not (TRACE_EXPORT_PATH or TRACE_COLLECTOR_URL):
+        return
+    payload = trace_to_otlp(trace)
+    if TRACE_EXPORT_PATH:
+        try:
+            with _export_lock, open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload) + "\n")
+        except Exception as e:
+            print(f"⚠️  Trace export to {TRACE_EXPORT_PATH} failed: {str(e)}")
+    if TRACE_COLLECTOR_URL:
+        # Don't hold up the request on the collector
+        _enqueue_for_collector(payload)